@@ -10,19 +10,29 @@ import sys
 import subprocess
 import shutil
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+def _remove_build_path(path):
+    """删除单个构建目录或文件"""
+    if os.path.isdir(path):
+        print(f"清理目录: {path}")
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        print(f"删除文件: {path}")
+        os.remove(path)
 
 def clean_build_dirs():
     """清理构建目录"""
     build_dirs = ['build', 'dist', 'SmartHomeGenerator.spec']
-    for dir_name in build_dirs:
-        if os.path.exists(dir_name):
-            print(f"清理目录: {dir_name}")
-            shutil.rmtree(dir_name) if os.path.isdir(dir_name) else os.remove(dir_name)
+    # 各路径互不相关，并行删除
+    with ThreadPoolExecutor(max_workers=len(build_dirs)) as executor:
+        list(executor.map(_remove_build_path, build_dirs))
 
 def create_spec_file():
     """创建PyInstaller spec文件"""
     spec_content = '''# -*- mode: python ; coding: utf-8 -*-
 
+import os
 import sys
 from pathlib import Path
 
@@ -34,7 +44,7 @@ block_cipher = None
 
 a = Analysis(
     ['run_gui.py'],
-    pathex=[],
+    pathex=['src'],
     binaries=[],
     datas=[
         # 模板文件
@@ -46,28 +56,30 @@ a = Analysis(
         # 源代码
         ('src', 'src'),
     ],
+    # 标准库由PyInstaller自动分析，这里只列出run_gui.py通过sys.path动态导入的模块
     hiddenimports=[
         'tkinter',
-        'tkinter.ttk', 
+        'tkinter.ttk',
         'tkinter.filedialog',
         'openpyxl',
-        'python_pptx',
-        'PIL',
-        'requests',
-        'os',
-        'sys',
-        'json',
-        'logging',
-        'src.smart_home_gui',
-        'src.gui_integration',
-        'src.smart_home_mold_library',
-        'src.template_based_procurement_generator',
-        'src.smart_analyze_plan',
+        'pptx',
+        'PIL.Image',
+        'smart_home_gui',
+        'gui_integration',
+        'smart_analyze_plan',
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        'test',
+        'tests',
+        'unittest',
+        'tkinter.test',
+        'pandas.tests',
+        'numpy.random._examples',
+        'matplotlib',
+    ],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -81,20 +93,17 @@ if os.path.exists('assets/images/icon.ico'):
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
+# onedir模式：启动时无需解压到临时目录
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='SmartHomeGenerator',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,  # 设置为False以隐藏控制台窗口
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -103,36 +112,31 @@ exe = EXE(
     entitlements_file=None,
     icon=icon_file,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=['vcruntime140.dll', 'python3*.dll'],
+    name='SmartHomeGenerator',
+)
 '''
     
-    with open('SmartHomeGenerator.spec', 'w', encoding='utf-8') as f:
-        f.write(spec_content)
+    Path('SmartHomeGenerator.spec').write_text(spec_content, encoding='utf-8')
     print("✓ 创建spec文件完成")
 
-def build_executable():
-    """构建可执行文件"""
+def build_executable(clean=False):
+    """基于spec文件构建可执行文件"""
     print("开始构建可执行文件...")
     
-    # 使用PyInstaller构建
-    cmd = [
-        'pyinstaller',
-        '--noconfirm',
-        '--clean',
-        '--onefile',
-        '--windowed',  # 窗口模式，不显示控制台
-        '--name', 'SmartHomeGenerator',
-        '--add-data', '采购清单模板.xlsx;.',
-        '--add-data', 'assets/智能家居产品库示例.xlsx;assets',
-        '--add-data', 'src;src',
-        '--hidden-import', 'tkinter',
-        '--hidden-import', 'tkinter.ttk',
-        '--hidden-import', 'tkinter.filedialog',
-        '--hidden-import', 'openpyxl',
-        '--hidden-import', 'python_pptx',
-        '--hidden-import', 'PIL',
-        '--hidden-import', 'requests',
-        'run_gui.py'
-    ]
+    # 打包参数统一在spec文件中维护；默认复用PyInstaller的分析缓存，仅在需要时完全重建
+    cmd = ['pyinstaller', '--noconfirm']
+    if clean:
+        cmd.append('--clean')
+    cmd.append('SmartHomeGenerator.spec')
     
     try:
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
@@ -211,8 +215,7 @@ echo 按任意键退出...
 pause >nul
 '''
     
-    with open('install.bat', 'w', encoding='utf-8') as f:
-        f.write(installer_content)
+    Path('install.bat').write_text(installer_content, encoding='utf-8')
     print("✓ 安装脚本创建完成")
 
 def create_portable_package():
@@ -234,8 +237,7 @@ echo 按任意键关闭窗口...
 pause >nul
 '''
     
-    with open('启动程序.bat', 'w', encoding='utf-8') as f:
-        f.write(portable_content)
+    Path('启动程序.bat').write_text(portable_content, encoding='utf-8')
     print("✓ 便携版启动脚本创建完成")
 
 def main():
@@ -250,17 +252,23 @@ def main():
         print("✓ PyInstaller已安装")
     except ImportError:
         print("✗ PyInstaller未安装，正在安装...")
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'pyinstaller'])
+        # 只安装预编译wheel，并使用项目内的pip缓存目录，重复构建时直接复用
+        subprocess.check_call(
+            [sys.executable, '-m', 'pip', 'install', '--prefer-binary', '--only-binary=:all:', 'pyinstaller>=6.0'],
+            env={**os.environ, 'PIP_CACHE_DIR': os.path.abspath('.pip-cache')}
+        )
         print("✓ PyInstaller安装完成")
     
-    # 清理构建目录
-    clean_build_dirs()
+    # 传入--clean时清理构建目录并完全重建，否则保留build/中的缓存做增量构建
+    clean = '--clean' in sys.argv
+    if clean:
+        clean_build_dirs()
     
     # 创建spec文件
     create_spec_file()
     
     # 构建可执行文件
-    build_executable()
+    build_executable(clean)
     
     # 创建安装脚本
     create_installer_script()
@@ -271,7 +279,7 @@ def main():
     print("\n" + "=" * 60)
     print("打包完成！")
     print("生成的文件：")
-    print("- dist/SmartHomeGenerator.exe (可执行文件)")
+    print("- dist/SmartHomeGenerator/ (程序目录，运行其中的SmartHomeGenerator.exe)")
     print("- install.bat (安装脚本)")
     print("- 启动程序.bat (便携版启动脚本)")
     print("=" * 60)
@@ -6,7 +6,37 @@
 
 import os
 import sys
+import hashlib
 import subprocess
+from pathlib import Path
+
+# 依赖检查通过后写入的标记文件，内容为当前解释器的缓存键
+DEPS_SENTINEL = Path.home() / '.smarthome_deps_ok'
+
+def _deps_cache_key():
+    """生成当前解释器的依赖检查缓存键"""
+    return hashlib.md5(f"{sys.version}-{sys.executable}".encode('utf-8')).hexdigest()
+
+def dependencies_cached():
+    """当前解释器是否已通过依赖检查"""
+    try:
+        return DEPS_SENTINEL.read_text(encoding='utf-8', errors='ignore') == _deps_cache_key()
+    except OSError:
+        return False
+
+def mark_dependencies_ok():
+    """记录依赖检查已通过"""
+    try:
+        DEPS_SENTINEL.write_text(_deps_cache_key(), encoding='utf-8')
+    except OSError:
+        pass
+
+def clear_dependencies_mark():
+    """清除依赖检查标记，下次启动时重新检查"""
+    try:
+        DEPS_SENTINEL.unlink()
+    except OSError:
+        pass
 
 def check_dependencies():
     """检查依赖包"""
@@ -47,19 +77,21 @@ def install_dependencies(missing_packages):
         'Pillow': 'Pillow'
     }
     
-    for package in missing_packages:
-        if package == 'tkinter':
-            print("错误: tkinter 是Python标准库，但当前环境可能不支持GUI")
-            return False
-        
-        pip_package = package_mapping.get(package)
-        if pip_package:
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", pip_package])
-                print(f"✓ 已安装 {package}")
-            except subprocess.CalledProcessError:
-                print(f"✗ 安装 {package} 失败")
-                return False
+    if 'tkinter' in missing_packages:
+        print("错误: tkinter 是Python标准库，但当前环境可能不支持GUI")
+        return False
+    
+    pip_packages = [package_mapping[package] for package in missing_packages if package_mapping.get(package)]
+    if not pip_packages:
+        return True
+    
+    # 一次pip调用安装全部缺失包，只解析一次依赖，优先使用wheel避免源码编译
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--prefer-binary", *pip_packages])
+        print(f"✓ 已安装 {', '.join(missing_packages)}")
+    except subprocess.CalledProcessError:
+        print(f"✗ 安装 {', '.join(missing_packages)} 失败")
+        return False
     
     return True
 
@@ -71,7 +103,11 @@ def main():
     
     # 检查依赖
     print("检查依赖包...")
-    missing_packages = check_dependencies()
+    if dependencies_cached():
+        # 标记与当前解释器一致，跳过逐个导入检查
+        missing_packages = []
+    else:
+        missing_packages = check_dependencies()
     
     if missing_packages:
         print(f"发现缺失的包: {', '.join(missing_packages)}")
@@ -90,6 +126,8 @@ def main():
     else:
         print("✓ 所有依赖包已就绪")
     
+    mark_dependencies_ok()
+    
     # 启动GUI应用
     print("启动GUI应用...")
     try:
@@ -98,6 +136,7 @@ def main():
         gui_main()
     except Exception as e:
         print(f"启动GUI应用时发生错误: {e}")
+        clear_dependencies_mark()
         print("请确保所有依赖包已正确安装")
         input("按回车键退出...")
 
@@ -6,15 +6,52 @@
 """
 
 import os
+import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# 并行备份的最大线程数，文件复制以IO为主
+MAX_BACKUP_WORKERS = 4
+
+def _copy_file_range(src_path, dst_path):
+    """
+    使用copy_file_range在内核中完成复制并保留元数据
+    Btrfs/XFS等支持reflink的文件系统上只共享数据块，不实际复制数据
+    """
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        # 提示内核按顺序预读源文件
+        os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src_path, dst_path)
+
+def _copy_file(src_path, dst_path):
+    """
+    复制文件并保留元数据
+    Windows下直接调用CopyFileW，由系统完成整文件复制；
+    Linux下优先使用copy_file_range，不支持时回退到shutil.copy2
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        if ctypes.windll.kernel32.CopyFileW(str(src_path), str(dst_path), False):
+            return
+        raise ctypes.WinError()
+    if hasattr(os, 'copy_file_range'):
+        try:
+            _copy_file_range(src_path, dst_path)
+            return
+        except OSError:
+            # 跨文件系统或文件系统不支持时回退，copy2会覆盖未写完的目标文件
+            pass
+    shutil.copy2(src_path, dst_path)
+
 def backup_file(file_path, backup_dir="backup"):
     """备份单个文件"""
-    if not os.path.exists(file_path):
-        print(f"❌ 文件不存在: {file_path}")
-        return False
-    
     # 创建备份目录
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir)
@@ -28,9 +65,13 @@ def backup_file(file_path, backup_dir="backup"):
     
     # 执行备份
     try:
-        shutil.copy2(file_path, backup_path)
+        _copy_file(file_path, backup_path)
         print(f"✅ 备份成功: {file_path} -> {backup_path}")
         return True
+    except FileNotFoundError:
+        # 不预先检查源文件，由复制操作本身报告文件不存在
+        print(f"❌ 文件不存在: {file_path}")
+        return False
     except Exception as e:
         print(f"❌ 备份失败: {file_path} - {e}")
         return False
@@ -53,12 +94,12 @@ def main():
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir)
     
-    success_count = 0
     total_count = len(files_to_backup)
     
-    for file_path in files_to_backup:
-        if backup_file(file_path, backup_dir):
-            success_count += 1
+    # 各文件备份互不依赖，并行复制
+    with ThreadPoolExecutor(max_workers=MAX_BACKUP_WORKERS) as executor:
+        results = list(executor.map(lambda file_path: backup_file(file_path, backup_dir), files_to_backup))
+    success_count = sum(results)
     
     print("-" * 60)
     print(f"📊 备份完成: {success_count}/{total_count} 个文件备份成功")
@@ -9,6 +9,8 @@ import json
 from typing import Dict, List, Any
 from datetime import datetime
 
+from json_report_writer import dump_json
+
 
 class BriefReportGenerator:
     """简要报告生成器"""
@@ -134,8 +136,7 @@ class BriefReportGenerator:
             bool: 是否成功保存
         """
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(brief_report, f, ensure_ascii=False, indent=2)
+            dump_json(brief_report, output_path)
             
             print(f"💾 简要设备清单报告已保存至: {output_path}")
             return True
@@ -6,8 +6,46 @@
 """
 
 import os
+import copy
 import json
+import atexit
 from datetime import datetime
+from functools import lru_cache
+
+from json_report_writer import dump_json
+
+try:
+    # orjson为Rust实现的JSON库，直接解析UTF-8字节
+    import orjson
+except ImportError:
+    orjson = None
+
+# 默认配置文件：程序目录下的 config.json
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+# 区分"键不存在"与"值为None"
+_MISSING = object()
+
+# 默认配置模板，last_updated在复制时填写
+DEFAULT_CONFIG = {
+    "version": "1.0",
+    "last_updated": None,
+    "mold_generation": {
+        "excel_file_path": "",
+        "mold_library_filename": "智能家居模具库"
+    },
+    "procurement_generation": {
+        "ppt_file_path": "",
+        "template_file_path": "",
+        "mold_library_file_path": "",
+        "procurement_filename": "采购清单"
+    },
+    "recent_files": {
+        "excel_files": [],
+        "ppt_files": [],
+        "template_files": []
+    }
+}
 
 
 class ConfigManager:
@@ -21,10 +59,20 @@ class ConfigManager:
             config_file: 配置文件路径，默认为程序目录下的 config.json
         """
         if config_file is None:
-            config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+            config_file = DEFAULT_CONFIG_FILE
         
         self.config_file = config_file
+        # 设置项修改后只标记为未保存，由flush()统一写盘
+        self._dirty = False
         self._load_config()
+        self._build_recent_sets()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
     
     def _load_config(self):
         """加载配置文件"""
@@ -32,19 +80,23 @@ class ConfigManager:
         default_config = self._get_default_config()
         
         try:
-            if os.path.exists(self.config_file):
+            # 直接打开文件，不存在时由open报错，省去单独的存在性检查
+            if orjson is not None:
+                with open(self.config_file, 'rb') as f:
+                    loaded_config = orjson.loads(f.read())
+            else:
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     loaded_config = json.load(f)
-                    
-                    # 合并配置，保留新字段
-                    self.config = self._merge_config(default_config, loaded_config)
-                    
-                print(f"配置文件加载成功: {self.config_file}")
-            else:
-                print("配置文件不存在，使用默认配置")
-                self.config = default_config
-                self.save_config()  # 创建默认配置文件
-                
+            
+            # 合并配置，保留新字段
+            self.config = self._merge_config(default_config, loaded_config)
+            print(f"配置文件加载成功: {self.config_file}")
+            
+        except FileNotFoundError:
+            print("配置文件不存在，使用默认配置")
+            self.config = default_config
+            self.save_config()  # 创建默认配置文件
+            
         except Exception as e:
             print(f"加载配置文件时出错: {e}")
             # 出错时使用默认配置
@@ -53,46 +105,46 @@ class ConfigManager:
     
     def _get_default_config(self):
         """获取默认配置"""
-        return {
-            "version": "1.0",
-            "last_updated": datetime.now().isoformat(),
-            "mold_generation": {
-                "excel_file_path": "",
-                "mold_library_filename": "智能家居模具库"
-            },
-            "procurement_generation": {
-                "ppt_file_path": "",
-                "template_file_path": "",
-                "mold_library_file_path": "",
-                "procurement_filename": "采购清单"
-            },
-            "recent_files": {
-                "excel_files": [],
-                "ppt_files": [],
-                "template_files": []
-            }
-        }
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config["last_updated"] = datetime.now().isoformat()
+        return config
     
     def _merge_config(self, default_config, current_config):
-        """合并配置，确保新字段存在"""
-        for key, value in default_config.items():
-            if key not in current_config:
-                current_config[key] = value
-            elif isinstance(value, dict) and isinstance(current_config[key], dict):
-                self._merge_config(value, current_config[key])
+        """合并配置，确保新字段存在（用显式栈逐层合并，不递归调用）"""
+        stack = [(default_config, current_config)]
+        while stack:
+            defaults, current = stack.pop()
+            for key, value in defaults.items():
+                existing = current.get(key, _MISSING)
+                if existing is _MISSING:
+                    # 缺失的字段（含整个子配置）直接使用默认值；
+                    # default_config是_get_default_config复制出的新对象，不会与模板共享
+                    current[key] = value
+                elif type(value) is dict and type(existing) is dict and existing != value:
+                    # 与默认值完全相同的子配置无需逐层合并
+                    stack.append((value, existing))
         return current_config
     
     def save_config(self):
         """保存配置文件"""
         try:
             self.config["last_updated"] = datetime.now().isoformat()
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
+            # 先写临时文件再替换，避免写到一半时退出导致配置文件损坏
+            temp_file = f"{self.config_file}.tmp"
+            dump_json(self.config, temp_file)
+            os.replace(temp_file, self.config_file)
+            self._dirty = False
             return True
         except Exception as e:
             print(f"保存配置文件失败: {e}")
             return False
     
+    def flush(self):
+        """将未保存的配置修改写入文件，没有修改时不写盘"""
+        if not self._dirty:
+            return True
+        return self.save_config()
+    
     def set_mold_generation_config(self, excel_file_path="", mold_library_filename=""):
         """设置模具生成配置"""
         if excel_file_path:
@@ -102,7 +154,8 @@ class ConfigManager:
         if mold_library_filename:
             self.config["mold_generation"]["mold_library_filename"] = mold_library_filename
         
-        return self.save_config()
+        self._dirty = True
+        return True
     
     def set_procurement_generation_config(self, ppt_file_path="", template_file_path="", 
                                         mold_library_file_path="", procurement_filename=""):
@@ -121,14 +174,26 @@ class ConfigManager:
         if procurement_filename:
             self.config["procurement_generation"]["procurement_filename"] = procurement_filename
         
-        return self.save_config()
+        self._dirty = True
+        return True
+    
+    def _build_recent_sets(self):
+        """为最近文件列表建立集合索引，查重时不再线性扫描列表（集合不写入配置文件）"""
+        self._recent_sets = {
+            file_type: set(files)
+            for file_type, files in self.config["recent_files"].items()
+        }
     
     def _add_recent_file(self, file_type, file_path):
         """添加最近使用的文件"""
-        if file_path not in self.config["recent_files"][file_type]:
-            self.config["recent_files"][file_type].insert(0, file_path)
+        recent_set = self._recent_sets[file_type]
+        if file_path not in recent_set:
+            recent_files = self.config["recent_files"][file_type]
+            recent_files.insert(0, file_path)
+            recent_set.add(file_path)
             # 最多保留10个最近文件
-            self.config["recent_files"][file_type] = self.config["recent_files"][file_type][:10]
+            while len(recent_files) > 10:
+                recent_set.discard(recent_files.pop())
     
     def get_mold_generation_config(self):
         """获取模具生成配置"""
@@ -144,28 +209,35 @@ class ConfigManager:
     
     def clear_config(self):
         """清除所有配置"""
-        self.config = {
-            "version": "1.0",
-            "last_updated": datetime.now().isoformat(),
-            "mold_generation": {
-                "excel_file_path": "",
-                "mold_library_filename": "智能家居模具库"
-            },
-            "procurement_generation": {
-                "ppt_file_path": "",
-                "template_file_path": "",
-                "mold_library_file_path": "",
-                "procurement_filename": "采购清单"
-            },
-            "recent_files": {
-                "excel_files": [],
-                "ppt_files": [],
-                "template_files": []
-            }
-        }
+        self.config = self._get_default_config()
+        self._build_recent_sets()
         return self.save_config()
 
 
+@lru_cache(maxsize=None)
+def _get_config_manager(config_file):
+    """按配置文件路径缓存ConfigManager实例，进程退出时写入尚未保存的修改"""
+    config_manager = ConfigManager(config_file)
+    # 每个配置文件只创建一次实例，退出钩子也只注册一次
+    atexit.register(config_manager.flush)
+    return config_manager
+
+
+def get_config_manager(config_file=None):
+    """
+    获取进程内共享的配置管理器，同一配置文件只加载一次
+    
+    Args:
+        config_file: 配置文件路径，默认为程序目录下的 config.json
+    
+    Returns:
+        ConfigManager: 共享的配置管理器实例
+    """
+    if config_file is None:
+        config_file = DEFAULT_CONFIG_FILE
+    return _get_config_manager(os.path.abspath(config_file))
+
+
 def test_config_manager():
     """测试配置管理器"""
     config_manager = ConfigManager()
@@ -190,6 +262,9 @@ def test_config_manager():
     print("模具生成配置:", mold_config)
     print("采购清单生成配置:", procurement_config)
     
+    # 写入修改
+    config_manager.flush()
+    
     # 测试清除配置
     # config_manager.clear_config()
 
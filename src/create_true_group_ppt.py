@@ -10,10 +10,37 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.enum.text import PP_ALIGN
+from collections import defaultdict
 import os
 
+from presentation_cache import save_presentation
+
+# 模具布局：每行4个产品组，尺寸统一换算为EMU
+COL_LEFTS = [Inches(1 + col * 2) for col in range(4)]
+PADDING = Inches(0.1)
+SHAPE_WIDTH = Inches(1.6)
+MAIN_HEIGHT = Inches(0.6)
+TEXT_HEIGHT = Inches(0.2)
+ID_HEIGHT = Inches(0.1)
+NAME_OFFSET = Inches(0.7)
+INFO_OFFSET = Inches(0.9)
+ID_OFFSET = Inches(1.1)
+
+# 各形状共用的样式
+LINE_COLOR = RGBColor(0, 0, 0)
+LINE_WIDTH = Pt(1)
+NAME_FONT_SIZE = Pt(10)
+INFO_FONT_SIZE = Pt(9)
+ID_FONT_SIZE = Pt(6)
+ID_COLOR = RGBColor(200, 200, 200)  # 浅灰色
+
 def create_true_group_mold_library():
-    """创建真正的组结构模具库（使用真正的GroupShape）"""
+    """
+    创建真正的组结构模具库（使用真正的GroupShape）
+    
+    Returns:
+        Tuple[Presentation, str]: 内存中的模具库PPT对象及其保存路径
+    """
     
     print("=== 创建真正的组结构PPT模具库 ===")
     print("📝 组名称直接使用产品ID")
@@ -26,19 +53,19 @@ def create_true_group_mold_library():
     title_slide.shapes.title.text = "智能家居模具库（真组结构）"
     title_slide.placeholders[1].text = "组名称=产品ID，支持完整复制"
     
-    # 产品数据（根据Excel文件）
+    # 产品数据（根据Excel文件），颜色以0xRRGGBB整数保存，使用时再转换
     products = [
         # 领普品牌
-        {'name': '一键智能开关', 'id': 'switch_1_lp', 'price': 79, 'color': RGBColor(240, 248, 255), 'brand': '领普'},
-        {'name': '二键智能开关', 'id': 'switch_2_lp', 'price': 89, 'color': RGBColor(240, 255, 240), 'brand': '领普'},
-        {'name': '三键智能开关', 'id': 'switch_3_lp', 'price': 99, 'color': RGBColor(255, 240, 245), 'brand': '领普'},
-        {'name': '四键智能开关', 'id': 'switch_4_lp', 'price': 109, 'color': RGBColor(255, 248, 220), 'brand': '领普'},
+        {'name': '一键智能开关', 'id': 'switch_1_lp', 'price': 79, 'color': 0xF0F8FF, 'brand': '领普'},
+        {'name': '二键智能开关', 'id': 'switch_2_lp', 'price': 89, 'color': 0xF0FFF0, 'brand': '领普'},
+        {'name': '三键智能开关', 'id': 'switch_3_lp', 'price': 99, 'color': 0xFFF0F5, 'brand': '领普'},
+        {'name': '四键智能开关', 'id': 'switch_4_lp', 'price': 109, 'color': 0xFFF8DC, 'brand': '领普'},
         
         # 易来品牌  
-        {'name': '一键智能开关', 'id': 'switch_1_yl', 'price': 79, 'color': RGBColor(220, 240, 255), 'brand': '易来'},
-        {'name': '二键智能开关', 'id': 'switch_2_yl', 'price': 89, 'color': RGBColor(220, 255, 240), 'brand': '易来'},
-        {'name': '三键智能开关', 'id': 'switch_3_yl', 'price': 99, 'color': RGBColor(255, 220, 245), 'brand': '易来'},
-        {'name': '四键智能开关', 'id': 'switch_4_yl', 'price': 109, 'color': RGBColor(255, 240, 220), 'brand': '易来'}
+        {'name': '一键智能开关', 'id': 'switch_1_yl', 'price': 79, 'color': 0xDCF0FF, 'brand': '易来'},
+        {'name': '二键智能开关', 'id': 'switch_2_yl', 'price': 89, 'color': 0xDCFFF0, 'brand': '易来'},
+        {'name': '三键智能开关', 'id': 'switch_3_yl', 'price': 99, 'color': 0xFFDCF5, 'brand': '易来'},
+        {'name': '四键智能开关', 'id': 'switch_4_yl', 'price': 109, 'color': 0xFFF0DC, 'brand': '易来'}
     ]
     
     # 添加产品模具幻灯片
@@ -51,19 +78,16 @@ def create_true_group_mold_library():
     title_frame.paragraphs[0].font.size = Pt(24)
     title_frame.paragraphs[0].font.bold = True
     
+    # 批量添加形状时缓存最大形状ID，避免每次add_shape/add_textbox都扫描整个spTree
+    slide.shapes.turbo_add_enabled = True
+    
+    # 每行4个产品，预先算出每个产品组容器的位置
+    row_tops = [Inches(1.5 + row * 1.5) for row in range((len(products) + 3) // 4)]
+    group_positions = [(COL_LEFTS[i % 4], row_tops[i // 4]) for i in range(len(products))]
+    
     # 添加产品模具（真组结构）
-    for i, product in enumerate(products):
-        row = i // 4
-        col = i % 4
-        
-        left = Inches(1 + col * 2)
-        top = Inches(1.5 + row * 1.5)
-        
-        # 创建组容器
-        group_left = left
-        group_top = top
-        group_width = Inches(1.8)
-        group_height = Inches(1.2)
+    for product, (group_left, group_top) in zip(products, group_positions):
+        shape_left = group_left + PADDING
         
         # 创建组内的各个元素
         shapes_in_group = []
@@ -71,47 +95,51 @@ def create_true_group_mold_library():
         # 1. 主形状（产品图标）
         main_shape = slide.shapes.add_shape(
             MSO_SHAPE.ROUNDED_RECTANGLE,
-            group_left + Inches(0.1), group_top + Inches(0.1), Inches(1.6), Inches(0.6)
+            shape_left, group_top + PADDING, SHAPE_WIDTH, MAIN_HEIGHT
         )
         main_shape.name = f"{product['id']}_main"
         main_shape.fill.solid()
-        main_shape.fill.fore_color.rgb = product['color']
-        main_shape.line.color.rgb = RGBColor(0, 0, 0)
-        main_shape.line.width = Pt(1)
+        main_shape.fill.fore_color.rgb = RGBColor.from_string(f"{product['color']:06X}")
+        main_line = main_shape.line
+        main_line.color.rgb = LINE_COLOR
+        main_line.width = LINE_WIDTH
         shapes_in_group.append(main_shape)
         
         # 2. 产品名称文本
         name_shape = slide.shapes.add_textbox(
-            group_left + Inches(0.1), group_top + Inches(0.7), Inches(1.6), Inches(0.2)
+            shape_left, group_top + NAME_OFFSET, SHAPE_WIDTH, TEXT_HEIGHT
         )
         name_shape.name = f"{product['id']}_name"
         name_frame = name_shape.text_frame
         name_frame.text = product['name']
-        name_frame.paragraphs[0].font.size = Pt(10)
-        name_frame.paragraphs[0].font.bold = True
-        name_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
+        name_paragraph = name_frame.paragraphs[0]
+        name_paragraph.font.size = NAME_FONT_SIZE
+        name_paragraph.font.bold = True
+        name_paragraph.alignment = PP_ALIGN.CENTER
         shapes_in_group.append(name_shape)
         
         # 3. 品牌和价格文本
         info_shape = slide.shapes.add_textbox(
-            group_left + Inches(0.1), group_top + Inches(0.9), Inches(1.6), Inches(0.2)
+            shape_left, group_top + INFO_OFFSET, SHAPE_WIDTH, TEXT_HEIGHT
         )
         info_shape.name = f"{product['id']}_info"
         info_frame = info_shape.text_frame
         info_frame.text = f"{product['brand']} ¥{product['price']}"
-        info_frame.paragraphs[0].font.size = Pt(9)
-        info_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
+        info_paragraph = info_frame.paragraphs[0]
+        info_paragraph.font.size = INFO_FONT_SIZE
+        info_paragraph.alignment = PP_ALIGN.CENTER
         shapes_in_group.append(info_shape)
         
         # 4. 隐藏的产品ID文本（用于识别）
         id_shape = slide.shapes.add_textbox(
-            group_left + Inches(0.1), group_top + Inches(1.1), Inches(1.6), Inches(0.1)
+            shape_left, group_top + ID_OFFSET, SHAPE_WIDTH, ID_HEIGHT
         )
         id_shape.name = f"{product['id']}_id"
         id_frame = id_shape.text_frame
         id_frame.text = f"ID:{product['id']}"
-        id_frame.paragraphs[0].font.size = Pt(6)
-        id_frame.paragraphs[0].font.color.rgb = RGBColor(200, 200, 200)  # 浅灰色
+        id_font = id_frame.paragraphs[0].font
+        id_font.size = ID_FONT_SIZE
+        id_font.color.rgb = ID_COLOR
         shapes_in_group.append(id_shape)
         
         # 创建真正的组（GroupShape）
@@ -127,7 +155,7 @@ def create_true_group_mold_library():
     
     # 保存文件
     output_path = 'E:\\Programs\\smarthome\\output\\smart_home_true_group_mold_gallery.pptx'
-    prs.save(output_path)
+    save_presentation(prs, output_path)
     
     print(f"\n✅ 真组结构PPT模具库已创建: {output_path}")
     print("\n📋 组结构特点:")
@@ -138,22 +166,29 @@ def create_true_group_mold_library():
     print("   • 品牌价格信息")
     print("   • 产品ID文本（用于识别）")
     
-    return output_path
+    return prs, output_path
 
-def test_true_group_recognition():
-    """测试真组识别功能"""
-    
-    print("\n=== 测试真组识别功能 ===")
+def test_true_group_recognition(verbose=False, prs=None):
+    """
+    测试真组识别功能
     
-    ppt_path = 'E:\\Programs\\smarthome\\output\\smart_home_true_group_mold_gallery.pptx'
+    Args:
+        verbose: 是否逐个输出每个产品组包含的形状
+        prs: 刚创建的模具库PPT对象，提供时直接检查，不再从磁盘重新解析
+    """
     
-    if not os.path.exists(ppt_path):
-        print("❌ PPT文件不存在，请先创建真组结构模具库")
-        return False
-    
-    from pptx import Presentation
+    print("\n=== 测试真组识别功能 ===")
     
-    prs = Presentation(ppt_path)
+    if prs is None:
+        ppt_path = 'E:\\Programs\\smarthome\\output\\smart_home_true_group_mold_gallery.pptx'
+        
+        if not os.path.exists(ppt_path):
+            print("❌ PPT文件不存在，请先创建真组结构模具库")
+            return False
+        
+        from presentation_cache import load_presentation
+        
+        prs = load_presentation(ppt_path)
     print(f"📊 幻灯片数量: {len(prs.slides)}")
     
     # 检查第二张幻灯片
@@ -162,25 +197,25 @@ def test_true_group_recognition():
         print(f"📄 第二张幻灯片形状数量: {len(slide.shapes)}")
         
         # 统计产品组
-        product_groups = {}
+        product_groups = defaultdict(list)
         for shape in slide.shapes:
-            if hasattr(shape, 'name') and shape.name:
+            shape_name = getattr(shape, 'name', None)
+            if shape_name:
                 # 解析产品ID（从形状名称中提取）
-                if '_id' in shape.name:
-                    product_id = shape.name.replace('_id', '')
-                    if product_id not in product_groups:
-                        product_groups[product_id] = []
+                if '_id' in shape_name:
+                    product_id = shape_name.replace('_id', '')
                     product_groups[product_id].append({
-                        'name': shape.name,
-                        'type': shape.name.split('_')[-1] if '_' in shape.name else 'unknown'
+                        'name': shape_name,
+                        'type': shape_name.rpartition('_')[2] if '_' in shape_name else 'unknown'
                     })
         
         print(f"🔍 识别到的产品组数量: {len(product_groups)}")
         
         for product_id, shapes in product_groups.items():
             print(f"   📦 产品组 {product_id}: {len(shapes)} 个相关形状")
-            for shape_info in shapes:
-                print(f"      {shape_info['type']}: {shape_info['name']}")
+            if verbose:
+                for shape_info in shapes:
+                    print(f"      {shape_info['type']}: {shape_info['name']}")
     
     return True
 
@@ -197,6 +232,9 @@ def create_enhanced_group_recognition_script():
 from pptx import Presentation
 import pandas as pd
 import os
+from collections import defaultdict
+
+from report_excel_writer import write_report_excel
 
 def read_excel_product_library(excel_path):
     """从Excel模具库读取产品信息"""
@@ -204,20 +242,19 @@ def read_excel_product_library(excel_path):
         print(f"❌ Excel模具库文件不存在: {excel_path}")
         return {}
     
-    df = pd.read_excel(excel_path)
-    product_library = {}
+    # 只读取需要的列，缺失的列使用默认值补齐
+    columns = {'设备名称': '', '品牌': '', '主规格': '', '设备品类': '', '单价': 0, '设备简称': ''}
+    df = pd.read_excel(excel_path, usecols=lambda column: column == '产品ID' or column in columns)
+    if '产品ID' not in df.columns:
+        df['产品ID'] = ''
+    for column, default in columns.items():
+        if column not in df.columns:
+            df[column] = default
     
-    for index, row in df.iterrows():
-        product_id = row.get('产品ID', '')
+    product_library = {}
+    for product_id, *values in df[['产品ID', *columns]].itertuples(index=False, name=None):
         if pd.notna(product_id) and product_id:
-            product_library[product_id] = {
-                '设备名称': row.get('设备名称', ''),
-                '品牌': row.get('品牌', ''),
-                '主规格': row.get('主规格', ''),
-                '设备品类': row.get('设备品类', ''),
-                '单价': row.get('单价', 0),
-                '设备简称': row.get('设备简称', '')
-            }
+            product_library[product_id] = dict(zip(columns, values))
     
     print(f"📊 从Excel读取 {len(product_library)} 个产品信息")
     return product_library
@@ -233,7 +270,7 @@ def analyze_true_group_ppt(ppt_path, product_library):
     print(f"📄 分析PPT文件: {os.path.basename(ppt_path)}")
     print(f"📊 幻灯片数量: {len(prs.slides)}")
     
-    device_count = {}
+    device_count = defaultdict(int)
     total_devices = 0
     
     # 遍历所有幻灯片
@@ -241,21 +278,18 @@ def analyze_true_group_ppt(ppt_path, product_library):
         print(f"\n📋 分析第 {slide_num} 张幻灯片...")
         
         # 统计产品组
-        product_groups = {}
+        product_groups = defaultdict(int)
         for shape in slide.shapes:
-            if hasattr(shape, 'name') and shape.name:
+            shape_name = getattr(shape, 'name', None)
+            if shape_name:
                 # 通过_id后缀识别产品组
-                if shape.name.endswith('_id'):
-                    product_id = shape.name.replace('_id', '')
+                if shape_name.endswith('_id'):
+                    product_id = shape_name.replace('_id', '')
                     if product_id in product_library:
-                        if product_id not in product_groups:
-                            product_groups[product_id] = 0
                         product_groups[product_id] += 1
         
         # 统计设备数量
         for product_id, count in product_groups.items():
-            if product_id not in device_count:
-                device_count[product_id] = 0
             device_count[product_id] += count
             total_devices += count
             
@@ -336,7 +370,7 @@ def generate_true_group_report(device_count, total_devices, product_library):
     
     report_df = pd.DataFrame(report_data)
     report_path = 'E:\\\\Programs\\\\smarthome\\\\output\\\\true_group_recognition_report.xlsx'
-    report_df.to_excel(report_path, index=False)
+    write_report_excel(report_df, report_path)
     
     print(f"\n📄 详细报告已保存到: {os.path.basename(report_path)}")
 
@@ -376,10 +410,10 @@ def main():
     print("="*60)
     
     # 创建真组结构模具库
-    ppt_path = create_true_group_mold_library()
+    prs, ppt_path = create_true_group_mold_library()
     
-    # 测试组识别功能
-    test_true_group_recognition()
+    # 测试组识别功能（直接使用内存中的PPT对象）
+    test_true_group_recognition(prs=prs)
     
     # 创建增强的组识别脚本
     script_path = create_enhanced_group_recognition_script()
@@ -5,26 +5,233 @@
 从PPT中识别设备组和对应的pdid标签
 """
 
-from pptx import Presentation
+import numpy as np
 import pandas as pd
-import json
+import re
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
 from typing import Dict, List, Tuple, Optional
 
+from product_library_cache import load_product_library
+from presentation_cache import load_presentation
+from pptx_index import shape_xml_text
+from pptx_xml_reader import NAMESPACES
+from json_report_writer import dump_json
+
+# pdid标签：以"pdid:"开头（允许前导空白），取到下一个冒号之前的部分作为编号
+PDID_LABEL_PATTERN = re.compile(r'\s*pdid:([^:]*)')
+
+# 设备组识别关键词：形状名称（忽略大小写）或文本中包含任一关键词即视为设备组，
+# 'smart_home_switch'已包含'switch'，无需单独判断
+DEVICE_NAME_KEYWORD = 'switch'
+DEVICE_TEXT_KEYWORDS = ('开关', 'switch')
+
+# 位置数组的列顺序
+POSITION_KEYS = ('left', 'top', 'width', 'height')
+_get_position_values = itemgetter(*POSITION_KEYS)
+# 设备组数×标签数达到该值时才使用numba编译版本，规模较小时广播计算已足够快
+NUMBA_MIN_PAIRS = 10000
+
+_P = '{%s}' % NAMESPACES['p']
+_A = '{%s}' % NAMESPACES['a']
+
+
+def is_device_group_shape(name: str, text: str) -> bool:
+    """根据形状名称或文本判断是否为设备组相关形状，名称命中时不再检查文本"""
+    if DEVICE_NAME_KEYWORD in name.lower():
+        return True
+    if not text:
+        return False
+    text = text.lower()
+    return any(keyword in text for keyword in DEVICE_TEXT_KEYWORDS)
+
+
+def _shape_position(shape) -> Dict[str, int]:
+    """读取形状的位置和尺寸（EMU）"""
+    return {
+        'left': shape.left,
+        'top': shape.top,
+        'width': shape.width,
+        'height': shape.height
+    }
+
+
+def _xml_shape_position(element) -> Optional[Dict[str, int]]:
+    """从形状XML的xfrm读取位置和尺寸（EMU），未设置xfrm（如继承版式位置的占位符）时返回None"""
+    xfrm = element.find(f'*/{_A}xfrm')
+    if xfrm is None:
+        # graphicFrame的xfrm位于p命名空间下
+        xfrm = element.find(f'{_P}xfrm')
+    if xfrm is None:
+        return None
+    off = xfrm.find(f'{_A}off')
+    ext = xfrm.find(f'{_A}ext')
+    if off is None or ext is None:
+        return None
+    return {
+        'left': int(off.get('x')),
+        'top': int(off.get('y')),
+        'width': int(ext.get('cx')),
+        'height': int(ext.get('cy'))
+    }
+
+
+def _process_slide(slide_element) -> Tuple[List[Dict], List[Dict], int, List[str]]:
+    """
+    遍历单张幻灯片XML的顶层形状，一次同时识别pdid标签和设备组
+    
+    Args:
+        slide_element: 幻灯片的p:sld根元素（slide.element）
+        
+    Returns:
+        Tuple[List[Dict], List[Dict], int, List[str]]:
+            pdid标签信息、设备组信息、符合pdid标签格式的形状数、
+            编号无法解析的pdid标签文本；结果中只包含基本类型
+    """
+    sp_tree = slide_element.find(f'{_P}cSld/{_P}spTree')
+    
+    labels = []
+    groups = []
+    label_count = 0
+    invalid_labels = []
+    
+    # 与slide.shapes相同，只有带cNvPr的子元素才是形状，下标与其一致
+    shape_idx = -1
+    for element in sp_tree:
+        c_nv_pr = element.find(f'*/{_P}cNvPr')
+        if c_nv_pr is None:
+            continue
+        shape_idx += 1
+        
+        name = c_nv_pr.get('name', '')
+        # python-pptx中只有p:sp（自选图形、文本框、占位符）具有文本框
+        has_text = element.tag == f'{_P}sp'
+        text = shape_xml_text(element) if has_text else ""
+        position = None
+        
+        if has_text:
+            label_text = text.strip()
+            match = PDID_LABEL_PATTERN.match(label_text)
+            if match:
+                label_count += 1
+                try:
+                    pdid = int(match.group(1))
+                    position = _xml_shape_position(element)
+                    labels.append({
+                        'shape_index': shape_idx,
+                        'name': name,
+                        'text': label_text,
+                        'pdid': pdid,
+                        'position': position
+                    })
+                except ValueError:
+                    invalid_labels.append(label_text)
+        
+        if is_device_group_shape(name, text):
+            if position is None:
+                position = _xml_shape_position(element)
+            groups.append({
+                'shape_index': shape_idx,
+                'name': name,
+                # 形状的XML标签名（sp/grpSp/pic/graphicFrame/cxnSp等），不是python-pptx的形状类名
+                'type': element.tag.rpartition('}')[2],
+                'has_text': has_text,
+                'text': text,
+                'position': position
+            })
+    
+    return labels, groups, label_count, invalid_labels
+
+
+def _position_array(items: List[Dict]) -> np.ndarray:
+    """将形状信息中的位置转换为(N, 4)的EMU整数数组，直接填充连续内存，不构造中间列表"""
+    values = chain.from_iterable(_get_position_values(item['position']) for item in items)
+    return np.fromiter(values, dtype=np.int64, count=len(items) * len(POSITION_KEYS)).reshape(-1, len(POSITION_KEYS))
+
+
+def match_label_positions(device_pos: np.ndarray, label_pos: np.ndarray) -> np.ndarray:
+    """
+    为每个设备组查找位于其下方且水平范围不超出设备组的第一个pdid标签
+    
+    Args:
+        device_pos: 设备组位置，形状为(D, 4)，列为left/top/width/height
+        label_pos: pdid标签位置，形状为(L, 4)
+        
+    Returns:
+        np.ndarray: 长度为D的标签下标数组，未匹配时为-1
+    """
+    if len(device_pos) * len(label_pos) >= NUMBA_MIN_PAIRS:
+        match_jit = _compile_match_label_positions()
+        if match_jit is not None:
+            return match_jit(device_pos, label_pos)
+    
+    d_left, d_top, d_width, d_height = (device_pos[:, i, None] for i in range(4))
+    l_left, l_top, l_width = (label_pos[None, :, i] for i in range(3))
+    
+    # mask[d, l]：标签l是否在设备组d下方
+    mask = (
+        (l_top >= d_top + d_height) &
+        (l_left >= d_left) &
+        (l_left + l_width <= d_left + d_width)
+    )
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def _match_label_positions_loop(device_pos, label_pos):
+    """match_label_positions的逐对扫描版本，供numba编译，找到第一个匹配标签后即停止扫描"""
+    result = np.full(device_pos.shape[0], -1, dtype=np.int64)
+    for d in range(device_pos.shape[0]):
+        d_left = device_pos[d, 0]
+        d_right = d_left + device_pos[d, 2]
+        d_bottom = device_pos[d, 1] + device_pos[d, 3]
+        for l in range(label_pos.shape[0]):
+            l_left = label_pos[l, 0]
+            if (label_pos[l, 1] >= d_bottom and l_left >= d_left and
+                    l_left + label_pos[l, 2] <= d_right):
+                result[d] = l
+                break
+    return result
+
+
+@lru_cache(maxsize=None)
+def _compile_match_label_positions():
+    """
+    首次遇到大规模匹配时才导入numba并编译扫描函数，结果缓存供后续调用复用
+
+    numba为可选依赖，导入耗时较长，小规模演示文稿无需承担该开销
+
+    Returns:
+        编译后的函数，未安装numba时返回None
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True)(_match_label_positions_loop)
+
+
 class DeviceIdentifier:
     """设备识别器"""
     
-    def __init__(self, ppt_path: str, excel_path: str = None):
+    def __init__(self, ppt_path: str, excel_path: str = None, verbose: bool = False):
         """
         初始化设备识别器
         
         Args:
             ppt_path: PPT文件路径
             excel_path: Excel文件路径（可选，用于验证）
+            verbose: 是否逐个输出每个形状/设备组的识别、匹配和验证结果
         """
         self.ppt_path = ppt_path
         self.excel_path = excel_path
+        self.verbose = verbose
         self.presentation = None
+        # 幻灯片列表在加载时展开一次，presentation.slides每次访问都会重新解析幻灯片关系
+        self.slides = []
         self.excel_data = None
+        # 产品ID到产品信息的索引，验证时按ID直接查找
+        self.product_index = {}
         
     def load_presentation(self) -> bool:
         """
@@ -34,9 +241,10 @@ class DeviceIdentifier:
             bool: 是否成功加载
         """
         try:
-            self.presentation = Presentation(self.ppt_path)
+            self.presentation = load_presentation(self.ppt_path)
+            self.slides = list(self.presentation.slides)
             print(f"✅ 成功加载PPT文件: {self.ppt_path}")
-            print(f"📊 幻灯片数量: {len(self.presentation.slides)}")
+            print(f"📊 幻灯片数量: {len(self.slides)}")
             return True
         except Exception as e:
             print(f"❌ 加载PPT文件失败: {e}")
@@ -54,7 +262,8 @@ class DeviceIdentifier:
             return True
         
         try:
-            self.excel_data = pd.read_excel(self.excel_path)
+            self.excel_data = load_product_library(self.excel_path)
+            self.product_index = self._build_product_index(self.excel_data)
             print(f"✅ 成功加载Excel文件: {self.excel_path}")
             print(f"📊 数据形状: {self.excel_data.shape}")
             return True
@@ -62,51 +271,85 @@ class DeviceIdentifier:
             print(f"❌ 加载Excel文件失败: {e}")
             return False
     
-    def identify_pdid_labels(self) -> Dict[int, List[Dict]]:
+    @staticmethod
+    def _build_product_index(excel_data: pd.DataFrame) -> Dict:
         """
-        识别PPT中的pdid标签
+        按产品ID建立产品信息索引，重复的产品ID以第一行为准
+        
+        Args:
+            excel_data: 产品库数据
+            
+        Returns:
+            Dict: 产品ID到设备名称、品牌、主规格的映射
+        """
+        if '产品ID' not in excel_data.columns:
+            return {}
+        
+        columns = ['设备名称', '品牌']
+        if '主规格' in excel_data.columns:
+            columns.append('主规格')
+        
+        return (
+            excel_data.drop_duplicates('产品ID')
+            .set_index('产品ID')[columns]
+            .to_dict('index')
+        )
+    
+    def identify_shapes(self) -> Tuple[Dict[int, List[Dict]], Dict[int, List[Dict]], int]:
+        """
+        一次遍历所有幻灯片的形状，同时识别pdid标签和设备组
         
         Returns:
-            Dict[int, List[Dict]]: 幻灯片索引到pdid标签信息的映射
+            Tuple[Dict[int, List[Dict]], Dict[int, List[Dict]], int]:
+                幻灯片索引到pdid标签信息的映射、幻灯片索引到设备组信息的映射、
+                符合pdid标签格式的形状总数（含编号无法解析的标签）
         """
         if self.presentation is None:
-            return {}
+            return {}, {}, 0
         
         pdid_labels = {}
+        device_groups = {}
+        pdid_label_count = 0
+        
+        # 直接遍历已解析的幻灯片XML，结果中只有基本类型，以形状下标代替形状对象；
+        # 单张幻灯片只需约0.3ms，不使用进程池（进程启动开销远大于收益，且打包为exe后子进程会重新启动GUI）
+        results = [_process_slide(slide.element) for slide in self.slides]
         
-        for slide_idx, slide in enumerate(self.presentation.slides):
-            print(f"\n🔍 识别第{slide_idx + 1}张幻灯片中的pdid标签:")
+        for slide_idx, (slide_labels, slide_groups, label_count, invalid_labels) in enumerate(results):
+            print(f"\n🔍 识别第{slide_idx + 1}张幻灯片中的pdid标签和设备组:")
+            pdid_label_count += label_count
             
-            slide_labels = []
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    text = shape.text.strip()
-                    
-                    # 检查是否为pdid标签
-                    if text.startswith('pdid:'):
-                        try:
-                            pdid = int(text.split(':')[1].strip())
-                            label_info = {
-                                'shape': shape,
-                                'name': shape.name,
-                                'text': text,
-                                'pdid': pdid,
-                                'position': {
-                                    'left': shape.left,
-                                    'top': shape.top,
-                                    'width': shape.width,
-                                    'height': shape.height
-                                }
-                            }
-                            slide_labels.append(label_info)
-                            print(f"   ✅ 发现pdid标签: {text} (形状: {shape.name})")
-                        except (ValueError, IndexError):
-                            print(f"   ⚠️ 无法解析pdid标签: {text}")
+            # 继承版式位置的占位符在XML中没有xfrm，回退到python-pptx读取
+            for info in chain(slide_labels, slide_groups):
+                if info['position'] is None:
+                    info['position'] = _shape_position(self.slides[slide_idx].shapes[info['shape_index']])
+            
+            if self.verbose:
+                for label in slide_labels:
+                    print(f"   ✅ 发现pdid标签: {label['text']} (形状: {label['name']})")
+                for label_text in invalid_labels:
+                    print(f"   ⚠️ 无法解析pdid标签: {label_text}")
+                for group in slide_groups:
+                    if group['has_text']:
+                        print(f"   ✅ 发现设备组: {group['name']} - {group['text'][:30]}...")
+                    else:
+                        print(f"   ✅ 发现设备组: {group['name']}")
             
             pdid_labels[slide_idx] = slide_labels
+            device_groups[slide_idx] = slide_groups
             print(f"   📊 本页pdid标签数量: {len(slide_labels)}")
+            print(f"   📊 本页设备组数量: {len(slide_groups)}")
         
-        return pdid_labels
+        return pdid_labels, device_groups, pdid_label_count
+    
+    def identify_pdid_labels(self) -> Dict[int, List[Dict]]:
+        """
+        识别PPT中的pdid标签
+        
+        Returns:
+            Dict[int, List[Dict]]: 幻灯片索引到pdid标签信息的映射
+        """
+        return self.identify_shapes()[0]
     
     def identify_device_groups(self) -> Dict[int, List[Dict]]:
         """
@@ -115,60 +358,7 @@ class DeviceIdentifier:
         Returns:
             Dict[int, List[Dict]]: 幻灯片索引到设备组信息的映射
         """
-        if self.presentation is None:
-            return {}
-        
-        device_groups = {}
-        
-        for slide_idx, slide in enumerate(self.presentation.slides):
-            print(f"\n🔍 识别第{slide_idx + 1}张幻灯片中的设备组:")
-            
-            slide_groups = []
-            for shape in slide.shapes:
-                shape_info = {
-                    'shape': shape,
-                    'name': shape.name,
-                    'type': type(shape).__name__,
-                    'has_text': shape.has_text_frame,
-                    'text': shape.text if shape.has_text_frame else "",
-                    'position': {
-                        'left': shape.left,
-                        'top': shape.top,
-                        'width': shape.width,
-                        'height': shape.height
-                    }
-                }
-                
-                # 判断是否为设备组相关形状
-                is_device_group = False
-                
-                # 根据形状名称判断
-                if 'smart_home_switch' in shape.name.lower() or 'switch' in shape.name.lower():
-                    is_device_group = True
-                
-                # 根据文本内容判断
-                elif shape.has_text_frame:
-                    # 安全地获取文本内容
-                    try:
-                        text_content = shape.text if hasattr(shape, 'text') else ""
-                        if '开关' in text_content or 'switch' in text_content.lower():
-                            is_device_group = True
-                    except:
-                        text_content = ""
-                
-                if is_device_group:
-                    slide_groups.append(shape_info)
-                    # 安全地显示文本内容
-                    try:
-                        display_text = shape.text[:30] if hasattr(shape, 'text') else ""
-                        print(f"   ✅ 发现设备组: {shape.name} - {display_text}...")
-                    except:
-                        print(f"   ✅ 发现设备组: {shape.name}")
-            
-            device_groups[slide_idx] = slide_groups
-            print(f"   📊 本页设备组数量: {len(slide_groups)}")
-        
-        return device_groups
+        return self.identify_shapes()[1]
     
     def match_devices_with_pdid(self, device_groups: Dict, pdid_labels: Dict) -> Dict[int, List[Dict]]:
         """
@@ -191,27 +381,25 @@ class DeviceIdentifier:
             
             matched = []
             
-            for device in slide_devices:
-                device_pos = device['position']
-                
-                # 查找与设备组位置相近的pdid标签
+            # 一次性计算本页所有设备组与pdid标签的位置关系
+            if slide_devices and slide_labels:
+                label_indices = match_label_positions(
+                    _position_array(slide_devices), _position_array(slide_labels)
+                )
+            else:
+                label_indices = np.full(len(slide_devices), -1)
+            
+            for device, label_idx in zip(slide_devices, label_indices):
                 matched_pdid = None
-                for label in slide_labels:
-                    label_pos = label['position']
-                    
-                    # 检查pdid标签是否在设备组下方
-                    if (label_pos['top'] >= device_pos['top'] + device_pos['height'] and
-                        label_pos['left'] >= device_pos['left'] and
-                        label_pos['left'] + label_pos['width'] <= device_pos['left'] + device_pos['width']):
-                        
-                        matched_pdid = label['pdid']
+                if label_idx >= 0:
+                    matched_pdid = slide_labels[label_idx]['pdid']
+                    if self.verbose:
                         print(f"   ✅ 设备组 {device['name']} 匹配pdid: {matched_pdid}")
-                        break
                 
                 if matched_pdid:
                     device['matched_pdid'] = matched_pdid
                     matched.append(device)
-                else:
+                elif self.verbose:
                     print(f"   ⚠️ 设备组 {device['name']} 未找到匹配的pdid标签")
             
             matched_devices[slide_idx] = matched
@@ -244,22 +432,24 @@ class DeviceIdentifier:
                 
                 if pdid:
                     # 在Excel中查找对应的产品信息
-                    product_info = self.excel_data[self.excel_data['产品ID'] == pdid]
+                    product_info = self.product_index.get(pdid)
                     
-                    if not product_info.empty:
+                    if product_info is not None:
                         device['excel_validation'] = {
                             'valid': True,
-                            'device_name': product_info['设备名称'].iloc[0],
-                            'brand': product_info['品牌'].iloc[0],
-                            'spec': product_info['主规格'].iloc[0] if '主规格' in product_info.columns else ''
+                            'device_name': product_info['设备名称'],
+                            'brand': product_info['品牌'],
+                            'spec': product_info.get('主规格', '')
                         }
-                        print(f"   ✅ 设备组 {device['name']} (pdid: {pdid}) 验证成功")
+                        if self.verbose:
+                            print(f"   ✅ 设备组 {device['name']} (pdid: {pdid}) 验证成功")
                     else:
                         device['excel_validation'] = {
                             'valid': False,
                             'error': f"Excel中未找到产品ID {pdid}"
                         }
-                        print(f"   ❌ 设备组 {device['name']} (pdid: {pdid}) 验证失败")
+                        if self.verbose:
+                            print(f"   ❌ 设备组 {device['name']} (pdid: {pdid}) 验证失败")
                 
                 validated.append(device)
             
@@ -267,20 +457,21 @@ class DeviceIdentifier:
         
         return validated_devices
     
-    def generate_identification_report(self, matched_devices: Dict) -> Dict:
+    def generate_identification_report(self, matched_devices: Dict, pdid_label_count: int) -> Dict:
         """
         生成设备识别报告
         
         Args:
             matched_devices: 匹配的设备组信息
+            pdid_label_count: identify_shapes统计的pdid标签总数
             
         Returns:
             Dict: 识别报告
         """
         report = {
-            'total_slides': len(self.presentation.slides),
+            'total_slides': len(self.slides),
             'total_devices_identified': 0,
-            'total_pdid_labels_found': 0,
+            'total_pdid_labels_found': pdid_label_count,
             'successful_matches': 0,
             'failed_matches': 0,
             'slide_details': {},
@@ -315,17 +506,10 @@ class DeviceIdentifier:
             report['total_devices_identified'] += len(devices)
             report['slide_details'][slide_idx] = slide_report
         
-        # 统计pdid标签总数
-        for slide_idx in range(len(self.presentation.slides)):
-            slide = self.presentation.slides[slide_idx]
-            for shape in slide.shapes:
-                if shape.has_text_frame and shape.text.strip().startswith('pdid:'):
-                    report['total_pdid_labels_found'] += 1
-        
         # 生成摘要
         report['summary'] = {
             'identification_rate': f"{report['successful_matches'] / report['total_devices_identified'] * 100:.1f}%" if report['total_devices_identified'] > 0 else "0%",
-            'average_devices_per_slide': report['total_devices_identified'] / len(self.presentation.slides) if len(self.presentation.slides) > 0 else 0
+            'average_devices_per_slide': report['total_devices_identified'] / len(self.slides) if self.slides else 0
         }
         
         return report
@@ -349,11 +533,8 @@ class DeviceIdentifier:
         if not self.load_excel_data():
             return None
         
-        # 识别pdid标签
-        pdid_labels = self.identify_pdid_labels()
-        
-        # 识别设备组
-        device_groups = self.identify_device_groups()
+        # 一次遍历形状，同时识别pdid标签和设备组
+        pdid_labels, device_groups, pdid_label_count = self.identify_shapes()
         
         # 匹配设备组和pdid标签
         matched_devices = self.match_devices_with_pdid(device_groups, pdid_labels)
@@ -362,7 +543,7 @@ class DeviceIdentifier:
         validated_devices = self.validate_with_excel(matched_devices)
         
         # 生成识别报告
-        report = self.generate_identification_report(validated_devices)
+        report = self.generate_identification_report(validated_devices, pdid_label_count)
         
         print("=" * 60)
         print("📊 设备识别报告摘要:")
@@ -376,18 +557,19 @@ class DeviceIdentifier:
         
         return report
 
-def identify_devices_in_ppt(ppt_path: str, excel_path: str = None) -> Optional[Dict]:
+def identify_devices_in_ppt(ppt_path: str, excel_path: str = None, verbose: bool = False) -> Optional[Dict]:
     """
     设备识别主函数
     
     Args:
         ppt_path: PPT文件路径
         excel_path: Excel文件路径（可选）
+        verbose: 是否输出逐个形状的识别详情
         
     Returns:
         Optional[Dict]: 识别报告
     """
-    identifier = DeviceIdentifier(ppt_path, excel_path)
+    identifier = DeviceIdentifier(ppt_path, excel_path, verbose)
     return identifier.identify_devices()
 
 if __name__ == "__main__":
@@ -395,15 +577,14 @@ if __name__ == "__main__":
     ppt_path = "E:\\Programs\\smarthome\\智能家居模具库.pptx"
     excel_path = "E:\\Programs\\smarthome\\智能家居模具库.xlsx"
     
-    report = identify_devices_in_ppt(ppt_path, excel_path)
+    report = identify_devices_in_ppt(ppt_path, excel_path, verbose=True)
     
     if report:
         print("🎯 设备识别任务完成")
         
         # 保存报告到文件
-        import json
-        with open("E:\\Programs\\smarthome\\src\\device_identification_report.json", 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        report_path = "E:\\Programs\\smarthome\\src\\device_identification_report.json"
+        dump_json(report, report_path)
         print("📄 识别报告已保存到: device_identification_report.json")
     else:
         print("❌ 设备识别失败")
\ No newline at end of file
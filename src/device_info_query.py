@@ -9,22 +9,41 @@ import pandas as pd
 import os
 from typing import Dict, List, Optional, Any
 
+from product_library_cache import load_product_library
+from json_report_writer import dump_json
+
+# 模具库列名到产品信息字段名的映射，顺序即输出字段顺序
+PRODUCT_FIELDS = {
+    '产品ID': 'pdid',
+    '品牌': 'brand',
+    '设备名称': 'device_name',
+    '主规格': 'specification',
+    '型号': 'model',
+    '价格': 'price',
+    '供应商': 'supplier',
+    '备注': 'notes'
+}
+
 class DeviceInfoQuery:
     """设备信息查询器"""
     
-    def __init__(self, excel_path: str = None):
+    def __init__(self, excel_path: str = None, verbose: bool = False):
         """
         初始化设备信息查询器
         
         Args:
             excel_path: Excel文件路径（智能家居模具库）
+            verbose: 是否逐个输出每个pdid的查询结果
         """
         if excel_path is None:
             # 默认使用项目根目录下的模具库文件
             excel_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '智能家居模具库.xlsx')
         
         self.excel_path = excel_path
+        self.verbose = verbose
         self.product_df = None
+        # 产品ID到整行产品信息的索引，查询时按ID直接查找
+        self.product_index = {}
         self.loaded = False
     
     def load_product_library(self) -> bool:
@@ -39,7 +58,7 @@ class DeviceInfoQuery:
             return False
         
         try:
-            self.product_df = pd.read_excel(self.excel_path)
+            self.product_df = load_product_library(self.excel_path)
             print(f"✅ 成功加载模具库，共 {len(self.product_df)} 个产品")
             
             # 检查必要的列是否存在
@@ -50,6 +69,7 @@ class DeviceInfoQuery:
                 print(f"⚠️ 模具库缺少必要的列: {missing_columns}")
                 return False
             
+            self.product_index = self._build_product_index(self.product_df)
             self.loaded = True
             return True
             
@@ -57,6 +77,32 @@ class DeviceInfoQuery:
             print(f"❌ 加载模具库失败: {e}")
             return False
     
+    @staticmethod
+    def _build_product_index(product_df: pd.DataFrame) -> Dict[Any, Dict[str, Any]]:
+        """
+        按产品ID建立产品信息索引，重复的产品ID以第一行为准
+        
+        Args:
+            product_df: 产品库数据
+            
+        Returns:
+            Dict: 产品ID到该行全部列值的映射
+        """
+        return (
+            product_df.drop_duplicates('产品ID')
+            .set_index('产品ID', drop=False)
+            .to_dict('index')
+        )
+    
+    @staticmethod
+    def _format_device_info(pdid, device_info: Dict[str, Any]) -> Dict[str, Any]:
+        """将模具库中的一行产品信息转换为设备信息字典，缺失的列填充空字符串"""
+        result = {'pdid': pdid}
+        for column, field in PRODUCT_FIELDS.items():
+            if column != '产品ID':
+                result[field] = device_info.get(column, '')
+        return result
+    
     def query_device_by_pdid(self, pdid: int) -> Optional[Dict[str, Any]]:
         """
         根据pdid查询设备信息
@@ -72,29 +118,19 @@ class DeviceInfoQuery:
             return None
         
         try:
-            # 在模具库中查找产品信息
-            product_info = self.product_df[self.product_df['产品ID'] == pdid]
+            # 在产品索引中查找第一条匹配的记录
+            device_info = self.product_index.get(pdid)
             
-            if product_info.empty:
-                print(f"⚠️ 未找到产品ID {pdid} 对应的设备信息")
+            if device_info is None:
+                if self.verbose:
+                    print(f"⚠️ 未找到产品ID {pdid} 对应的设备信息")
                 return None
             
-            # 获取第一条匹配的记录
-            device_info = product_info.iloc[0].to_dict()
-            
             # 格式化返回信息
-            result = {
-                'pdid': pdid,
-                'brand': device_info.get('品牌', ''),
-                'device_name': device_info.get('设备名称', ''),
-                'specification': device_info.get('主规格', ''),
-                'model': device_info.get('型号', ''),
-                'price': device_info.get('价格', ''),
-                'supplier': device_info.get('供应商', ''),
-                'notes': device_info.get('备注', '')
-            }
+            result = self._format_device_info(pdid, device_info)
             
-            print(f"✅ 找到产品ID {pdid} 的设备: {result['brand']} {result['device_name']}")
+            if self.verbose:
+                print(f"✅ 找到产品ID {pdid} 的设备: {result['brand']} {result['device_name']}")
             return result
             
         except Exception as e:
@@ -125,8 +161,31 @@ class DeviceInfoQuery:
                 device_mapping[pdid] = device_info
         
         print(f"📊 成功查询到 {len(device_mapping)} 个设备的详细信息")
+        missing_count = sum(1 for pdid in pdid_list if pdid not in device_mapping)
+        if missing_count:
+            print(f"⚠️ 有 {missing_count} 个pdid未找到对应的设备信息")
         return device_mapping
     
+    def query_devices_dataframe(self, pdid_list: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量查询设备信息，用一次isin筛选出所有匹配行，不逐个输出查询结果
+        
+        Args:
+            pdid_list: pdid值列表
+            
+        Returns:
+            Dict[int, Dict]: pdid到设备信息的映射，重复的产品ID以第一行为准
+        """
+        if not self.loaded:
+            print("❌ 请先加载模具库")
+            return {}
+        
+        matched = self.product_df[self.product_df['产品ID'].isin(pdid_list)].drop_duplicates('产品ID')
+        return {
+            record['产品ID']: self._format_device_info(record['产品ID'], record)
+            for record in matched.to_dict('records')
+        }
+    
     def get_all_products(self) -> List[Dict[str, Any]]:
         """
         获取模具库中所有产品信息
@@ -138,18 +197,15 @@ class DeviceInfoQuery:
             print("❌ 请先加载模具库")
             return []
         
+        # 只取存在的列按行元组遍历，不为每行构造Series；缺失的列填充空字符串
+        columns = [column for column in PRODUCT_FIELDS if column in self.product_df.columns]
+        fields = [PRODUCT_FIELDS[column] for column in columns]
+        template = dict.fromkeys(PRODUCT_FIELDS.values(), '')
+        
         products = []
-        for _, row in self.product_df.iterrows():
-            product_info = {
-                'pdid': row['产品ID'],
-                'brand': row.get('品牌', ''),
-                'device_name': row.get('设备名称', ''),
-                'specification': row.get('主规格', ''),
-                'model': row.get('型号', ''),
-                'price': row.get('价格', ''),
-                'supplier': row.get('供应商', ''),
-                'notes': row.get('备注', '')
-            }
+        for row in self.product_df[columns].itertuples(index=False, name=None):
+            product_info = template.copy()
+            product_info.update(zip(fields, row))
             products.append(product_info)
         
         return products
@@ -172,9 +228,7 @@ class DeviceInfoQuery:
                 'devices': device_mapping
             }
             
-            import json
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            dump_json(report, output_path)
             
             print(f"\n💾 设备查询报告已保存至: {output_path}")
             return True
@@ -191,7 +245,7 @@ def test_device_info_query():
     print("="*60)
     
     # 创建查询器
-    query = DeviceInfoQuery()
+    query = DeviceInfoQuery(verbose=True)
     
     # 加载模具库
     if not query.load_product_library():
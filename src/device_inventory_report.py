@@ -7,8 +7,11 @@
 
 import json
 import os
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any
+
+from json_report_writer import dump_json
 
 
 class DeviceInventoryReport:
@@ -86,13 +89,11 @@ class DeviceInventoryReport:
         
         # 详细设备清单 - 从品牌统计中提取所有设备
         if 'brand_stats' in statistics_data:
-            detailed_inventory = []
-            for brand, devices in statistics_data['brand_stats'].items():
-                for device in devices:
-                    device_info = device.copy()
-                    device_info['brand'] = brand
-                    detailed_inventory.append(device_info)
-            inventory_report['detailed_inventory'] = detailed_inventory
+            inventory_report['detailed_inventory'] = [
+                {**device, 'brand': brand}
+                for brand, devices in statistics_data['brand_stats'].items()
+                for device in devices
+            ]
         
         # 统计分析
         inventory_report['statistical_analysis'] = self._generate_statistical_analysis(statistics_data)
@@ -117,61 +118,46 @@ class DeviceInventoryReport:
             'key_insights': []
         }
         
-        # 设备分布分析
+        # 一次遍历品牌统计，同时得到设备类型分布和品牌分布
         if 'brand_stats' in statistics_data:
-            devices = []
-            for brand, brand_devices in statistics_data['brand_stats'].items():
-                devices.extend(brand_devices)
-            
-            # 按设备类型分布
-            type_distribution = {}
-            for device in devices:
-                device_type = device.get('device_name', '未知')
-                count = device.get('count', 0)
-                if device_type in type_distribution:
-                    type_distribution[device_type] += count
-                else:
-                    type_distribution[device_type] = count
-            
-            analysis['device_distribution'] = type_distribution
-        
-        # 品牌分布分析
-        if 'brand_stats' in statistics_data:
-            brand_stats = statistics_data['brand_stats']
+            type_distribution = defaultdict(int)
             brand_distribution = {}
             
-            for brand, devices in brand_stats.items():
-                total_count = 0
+            for brand, devices in statistics_data['brand_stats'].items():
+                brand_total = 0
                 for device in devices:
-                    total_count += device.get('count', 0)
-                brand_distribution[brand] = total_count
+                    count = device.get('count', 0)
+                    brand_total += count
+                    type_distribution[device.get('device_name', '未知')] += count
+                brand_distribution[brand] = brand_total
             
+            analysis['device_distribution'] = dict(type_distribution)
             analysis['brand_distribution'] = brand_distribution
         
         # 分类分布分析
         if 'category_stats' in statistics_data:
-            category_stats = statistics_data['category_stats']
-            category_distribution = {}
-            
-            for category, devices in category_stats.items():
-                total_count = 0
-                for device in devices:
-                    total_count += device.get('count', 0)
-                category_distribution[category] = total_count
-            
-            analysis['category_distribution'] = category_distribution
+            analysis['category_distribution'] = {
+                category: sum(device.get('count', 0) for device in devices)
+                for category, devices in statistics_data['category_stats'].items()
+            }
         
-        # 关键洞察
-        analysis['key_insights'] = self._generate_key_insights(statistics_data)
+        # 关键洞察，直接使用上面汇总出的分布，不再重新遍历设备
+        analysis['key_insights'] = self._generate_key_insights(
+            statistics_data, analysis['brand_distribution'], analysis['device_distribution']
+        )
         
         return analysis
     
-    def _generate_key_insights(self, statistics_data: Dict[str, Any]) -> List[str]:
+    def _generate_key_insights(self, statistics_data: Dict[str, Any],
+                               brand_distribution: Dict[str, int],
+                               device_distribution: Dict[str, int]) -> List[str]:
         """
         生成关键洞察
         
         Args:
             statistics_data: 设备统计数据
+            brand_distribution: 品牌到设备数量的映射
+            device_distribution: 设备类型到设备数量的映射
             
         Returns:
             List[str]: 关键洞察列表
@@ -188,122 +174,110 @@ class DeviceInventoryReport:
             insights.append(f"设备种类: {unique_pdids} 种")
             insights.append(f"品牌数量: {brands} 个")
             insights.append(f"设备分类: {categories} 类")
-        
-        # 品牌分析
-        if 'brand_statistics' in statistics_data:
-            brand_stats = statistics_data['brand_statistics']
-            if brand_stats:
-                brand_counts = {}
-                for brand, devices in brand_stats.items():
-                    total_count = sum(device.get('count', 0) for device in devices)
-                    brand_counts[brand] = total_count
-                
-                if brand_counts:
-                    max_brand = max(brand_counts, key=brand_counts.get)
-                    max_count = brand_counts[max_brand]
-                    percentage = (max_count / total_devices) * 100
-                    insights.append(f"主要品牌: {max_brand} (占比: {percentage:.1f}%)")
-        
-        # 设备类型分析
-        if 'detailed_statistics' in statistics_data:
-            devices = statistics_data['detailed_statistics']
-            if devices:
-                type_counts = {}
-                for device in devices:
-                    device_type = device.get('device_name', '未知')
-                    count = device.get('count', 0)
-                    if device_type in type_counts:
-                        type_counts[device_type] += count
-                    else:
-                        type_counts[device_type] = count
-                
-                if type_counts:
-                    max_type = max(type_counts, key=type_counts.get)
-                    max_count = type_counts[max_type]
-                    percentage = (max_count / total_devices) * 100
-                    insights.append(f"主要设备类型: {max_type} (占比: {percentage:.1f}%)")
+            
+            # 品牌分析
+            if brand_distribution:
+                max_brand = max(brand_distribution, key=brand_distribution.get)
+                percentage = (brand_distribution[max_brand] / total_devices) * 100
+                insights.append(f"主要品牌: {max_brand} (占比: {percentage:.1f}%)")
+            
+            # 设备类型分析
+            if device_distribution:
+                max_type = max(device_distribution, key=device_distribution.get)
+                percentage = (device_distribution[max_type] / total_devices) * 100
+                insights.append(f"主要设备类型: {max_type} (占比: {percentage:.1f}%)")
         
         return insights
     
-    def generate_console_output(self, inventory_report: Dict[str, Any]) -> str:
+    def _iter_console_lines(self, inventory_report: Dict[str, Any]) -> Iterator[str]:
         """
-        生成控制台输出格式
+        逐行产出控制台输出格式的报告内容
         
         Args:
             inventory_report: 设备清单报告
             
         Returns:
-            str: 控制台输出内容
+            Iterator[str]: 报告文本行（不含行尾换行符）
         """
-        output = []
-        
         # 报告标题
-        output.append("📋 设备清单报告")
-        output.append("=" * 60)
+        yield "📋 设备清单报告"
+        yield "=" * 60
         
         # 总体统计
         summary = inventory_report.get('summary', {})
         if summary:
-            output.append("📊 总体统计:")
-            output.append(f"   • 设备总数: {summary.get('total_devices', 0)} 个")
-            output.append(f"   • 设备种类: {summary.get('unique_pdids', 0)} 种")
-            output.append(f"   • 品牌数量: {summary.get('brands', 0)} 个")
-            output.append(f"   • 设备分类: {summary.get('categories', 0)} 类")
+            yield "📊 总体统计:"
+            yield f"   • 设备总数: {summary.get('total_devices', 0)} 个"
+            yield f"   • 设备种类: {summary.get('unique_pdids', 0)} 种"
+            yield f"   • 品牌数量: {summary.get('brands', 0)} 个"
+            yield f"   • 设备分类: {summary.get('categories', 0)} 类"
             if summary.get('total_price', 0) > 0:
-                output.append(f"   • 总价值: ¥{summary.get('total_price', 0):,.2f}")
+                yield f"   • 总价值: ¥{summary.get('total_price', 0):,.2f}"
         
         # 按品牌分类的设备清单
         inventory_by_brand = inventory_report.get('inventory_by_brand', {})
         if inventory_by_brand:
-            output.append("\n🏷️ 按品牌分类的设备清单:")
+            yield "\n🏷️ 按品牌分类的设备清单:"
             for brand, devices in inventory_by_brand.items():
                 total_count = sum(device.get('count', 0) for device in devices)
-                output.append(f"\n   📍 {brand} (总计: {total_count} 个):")
+                yield f"\n   📍 {brand} (总计: {total_count} 个):"
                 for device in devices:
-                    output.append(f"      📱 {device.get('device_name', '未知')}")
-                    output.append(f"         • 规格: {device.get('specification', '未知')}")
-                    output.append(f"         • 数量: {device.get('count', 0)} 个")
+                    yield f"      📱 {device.get('device_name', '未知')}"
+                    yield f"         • 规格: {device.get('specification', '未知')}"
+                    yield f"         • 数量: {device.get('count', 0)} 个"
                     if device.get('unit_price', 0) > 0:
-                        output.append(f"         • 单价: ¥{device.get('unit_price', 0):,.2f}")
+                        yield f"         • 单价: ¥{device.get('unit_price', 0):,.2f}"
         
         # 统计分析
         statistical_analysis = inventory_report.get('statistical_analysis', {})
         if statistical_analysis:
-            output.append("\n📈 统计分析:")
+            yield "\n📈 统计分析:"
             
             # 关键洞察
             key_insights = statistical_analysis.get('key_insights', [])
             if key_insights:
-                output.append("   🔍 关键洞察:")
+                yield "   🔍 关键洞察:"
                 for insight in key_insights:
-                    output.append(f"      • {insight}")
+                    yield f"      • {insight}"
             
             # 品牌分布
             brand_distribution = statistical_analysis.get('brand_distribution', {})
             if brand_distribution:
-                output.append("\n   🏷️ 品牌分布:")
+                yield "\n   🏷️ 品牌分布:"
                 for brand, count in brand_distribution.items():
                     percentage = (count / summary.get('total_devices', 1)) * 100
-                    output.append(f"      • {brand}: {count} 个 ({percentage:.1f}%)")
+                    yield f"      • {brand}: {count} 个 ({percentage:.1f}%)"
             
             # 设备类型分布
             device_distribution = statistical_analysis.get('device_distribution', {})
             if device_distribution:
-                output.append("\n   📱 设备类型分布:")
+                yield "\n   📱 设备类型分布:"
                 for device_type, count in device_distribution.items():
                     percentage = (count / summary.get('total_devices', 1)) * 100
-                    output.append(f"      • {device_type}: {count} 个 ({percentage:.1f}%)")
+                    yield f"      • {device_type}: {count} 个 ({percentage:.1f}%)"
         
         # 报告生成时间
         generated_time = inventory_report.get('generated_time', '')
         if generated_time:
             try:
                 dt = datetime.fromisoformat(generated_time.replace('Z', '+00:00'))
-                output.append(f"\n⏰ 报告生成时间: {dt.strftime('%Y-%m-%d %H:%M:%S')}")
+                generated_time = dt.strftime('%Y-%m-%d %H:%M:%S')
             except:
-                output.append(f"\n⏰ 报告生成时间: {generated_time}")
+                # 无法解析的时间原样输出
+                pass
+            yield f"\n⏰ 报告生成时间: {generated_time}"
+    
+    def generate_console_output(self, inventory_report: Dict[str, Any]) -> str:
+        """
+        生成控制台输出格式
         
-        return '\n'.join(output)
+        Args:
+            inventory_report: 设备清单报告
+            
+        Returns:
+            str: 控制台输出内容
+        """
+        return '\n'.join(self._iter_console_lines(inventory_report))
     
     def save_inventory_report(self, inventory_report: Dict[str, Any]) -> str:
         """
@@ -318,20 +292,19 @@ class DeviceInventoryReport:
         report_file = "device_inventory_report.json"
         
         try:
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(inventory_report, f, ensure_ascii=False, indent=2)
+            dump_json(inventory_report, report_file)
             print(f"💾 设备清单报告已保存至: {report_file}")
             return report_file
         except Exception as e:
             print(f"❌ 保存设备清单报告失败: {e}")
             return ""
     
-    def save_text_report(self, console_output: str) -> str:
+    def save_text_report(self, inventory_report: Dict[str, Any]) -> str:
         """
-        保存文本格式的设备清单报告
+        保存文本格式的设备清单报告，逐行写入文件，不在内存中拼接整份文本
         
         Args:
-            console_output: 控制台输出内容
+            inventory_report: 设备清单报告
             
         Returns:
             str: 保存的文件路径
@@ -340,7 +313,7 @@ class DeviceInventoryReport:
         
         try:
             with open(report_file, 'w', encoding='utf-8') as f:
-                f.write(console_output)
+                f.writelines(f"{line}\n" for line in self._iter_console_lines(inventory_report))
             print(f"💾 文本格式设备清单报告已保存至: {report_file}")
             return report_file
         except Exception as e:
@@ -376,7 +349,7 @@ def test_device_inventory_report():
     
     # 保存报告
     json_report_path = report_generator.save_inventory_report(inventory_report)
-    text_report_path = report_generator.save_text_report(console_output)
+    text_report_path = report_generator.save_text_report(inventory_report)
     
     if json_report_path and text_report_path:
         print("✅ 设备清单报告生成测试完成")
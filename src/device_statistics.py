@@ -8,6 +8,19 @@
 import json
 from typing import Dict, List, Any
 from collections import defaultdict
+from functools import lru_cache
+
+from json_report_writer import dump_json
+
+# 设备名称关键词到设备类型的映射，按优先级排列：名称同时包含多个关键词时取靠前的一项
+DEVICE_CATEGORY_KEYWORDS = (
+    ('开关', '智能开关'),
+    ('插座', '智能插座'),
+    ('传感器', '传感器'),
+    ('网关', '网关'),
+    ('面板', '控制面板'),
+)
+DEFAULT_DEVICE_CATEGORY = '其他设备'
 
 class DeviceStatistics:
     """设备统计器"""
@@ -69,34 +82,36 @@ class DeviceStatistics:
         
         # 统计设备数量和分类
         for pdid, count in pdid_counts.items():
-            # 处理PDID类型不匹配问题：pdid_counts中是整数，device_mapping中是字符串
-            pdid_key = str(pdid)
-            if pdid_key in device_mapping:
-                device_info = device_mapping[pdid_key]
-                
-                # 统计设备数量
-                self.device_counts[pdid] = count
-                self.total_devices += count
-                
-                # 按品牌统计
-                brand = device_info.get('brand', '未知品牌')
-                self.brand_stats[brand].append({
-                    'pdid': pdid,
-                    'device_name': device_info.get('device_name', ''),
-                    'specification': device_info.get('specification', ''),
-                    'count': count
-                })
-                
-                # 按设备类型统计（从设备名称中提取类型）
-                device_name = device_info.get('device_name', '')
-                category = self._extract_device_category(device_name)
-                self.category_stats[category].append({
-                    'pdid': pdid,
-                    'device_name': device_name,
-                    'brand': brand,
-                    'specification': device_info.get('specification', ''),
-                    'count': count
-                })
+            device_info = device_mapping.get(pdid)
+            if device_info is None:
+                continue
+            
+            # 统计设备数量
+            self.device_counts[pdid] = count
+            self.total_devices += count
+            
+            # 设备字段只读取一次，品牌统计和分类统计共用
+            brand = device_info.get('brand', '未知品牌')
+            device_name = device_info.get('device_name', '')
+            specification = device_info.get('specification', '')
+            
+            # 按品牌统计
+            self.brand_stats[brand].append({
+                'pdid': pdid,
+                'device_name': device_name,
+                'specification': specification,
+                'count': count
+            })
+            
+            # 按设备类型统计（从设备名称中提取类型）
+            category = self._extract_device_category(device_name)
+            self.category_stats[category].append({
+                'pdid': pdid,
+                'device_name': device_name,
+                'brand': brand,
+                'specification': specification,
+                'count': count
+            })
         
         return {
             'total_devices': self.total_devices,
@@ -108,9 +123,11 @@ class DeviceStatistics:
             'category_stats': dict(self.category_stats)
         }
     
-    def _extract_device_category(self, device_name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _extract_device_category(device_name: str) -> str:
         """
-        从设备名称中提取设备类型
+        从设备名称中提取设备类型，结果按设备名称缓存（多个pdid常共用同一设备名称）
         
         Args:
             device_name: 设备名称
@@ -118,18 +135,10 @@ class DeviceStatistics:
         Returns:
             str: 设备类型
         """
-        if '开关' in device_name:
-            return '智能开关'
-        elif '插座' in device_name:
-            return '智能插座'
-        elif '传感器' in device_name:
-            return '传感器'
-        elif '网关' in device_name:
-            return '网关'
-        elif '面板' in device_name:
-            return '控制面板'
-        else:
-            return '其他设备'
+        for keyword, category in DEVICE_CATEGORY_KEYWORDS:
+            if keyword in device_name:
+                return category
+        return DEFAULT_DEVICE_CATEGORY
     
     def generate_statistics_report(self, statistics: Dict[str, Any]) -> str:
         """
@@ -203,8 +212,7 @@ class DeviceStatistics:
                 'category_stats': statistics['category_stats']
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            dump_json(report, output_path)
             
             print(f"💾 设备统计报告已保存至: {output_path}")
             return True
@@ -236,7 +244,8 @@ def test_device_statistics():
     try:
         with open("device_query_report.json", 'r', encoding='utf-8') as f:
             device_query_data = json.load(f)
-        device_mapping = device_query_data.get('devices', {})
+        # JSON对象的键均为字符串，读入时统一转换为整数pdid，与pdid_counts一致
+        device_mapping = {int(pdid): info for pdid, info in device_query_data.get('devices', {}).items()}
         print(f"📋 可查询的设备数量: {len(device_mapping)}")
     except Exception as e:
         print(f"❌ 无法加载设备查询数据: {e}")
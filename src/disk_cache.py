@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+磁盘缓存模块
+按源文件内容哈希把解析结果保存到当前用户的缓存目录，供形状索引、产品库等缓存共用；
+缓存不放在输入文件旁边，避免读入随数据文件一起分发的缓存内容
+"""
+
+import os
+import sys
+import hashlib
+from typing import Optional
+
+APP_CACHE_NAME = 'smarthome'
+
+
+def user_cache_dir() -> str:
+    """获取当前用户的缓存根目录（Windows为%LOCALAPPDATA%，其他系统遵循XDG约定）"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, APP_CACHE_NAME)
+
+
+def cache_file_path(namespace: str, source_path: str, suffix: str) -> str:
+    """
+    计算源文件对应的缓存文件路径
+
+    文件名为"<源文件路径哈希>-<源文件内容SHA-1><suffix>"，
+    前半部分用于在写入新缓存时找到同一源文件的旧缓存
+
+    Args:
+        namespace: 缓存类别，对应缓存根目录下的子目录
+        source_path: 源文件路径
+        suffix: 缓存文件后缀（可包含格式版本号）
+
+    Returns:
+        str: 缓存文件路径
+    """
+    source_key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:16]
+    content_sha1 = hashlib.sha1()
+    with open(source_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            content_sha1.update(chunk)
+    return os.path.join(user_cache_dir(), namespace, f"{source_key}-{content_sha1.hexdigest()}{suffix}")
+
+
+def read_cache(cache_path: str) -> Optional[bytes]:
+    """读取缓存文件内容，缓存不存在或不可读时返回None"""
+    try:
+        with open(cache_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cache(cache_path: str, data: bytes):
+    """
+    先写临时文件再替换，写入成功后删除同一源文件的旧缓存
+
+    缓存目录不可写时只影响下次启动速度，不报错
+
+    Args:
+        cache_path: cache_file_path计算出的缓存文件路径
+        data: 缓存内容
+    """
+    cache_dir, file_name = os.path.split(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        return
+
+    # 源文件每次修改都会产生新的缓存文件，旧的不再可能命中
+    source_prefix = file_name.split('-', 1)[0] + '-'
+    for name in os.listdir(cache_dir):
+        if name.startswith(source_prefix) and name != file_name and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
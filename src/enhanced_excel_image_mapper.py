@@ -58,67 +58,72 @@ class EnhancedExcelImageMapper:
             行号到DISPIMG信息的映射
         """
         try:
-            workbook = openpyxl.load_workbook(self.excel_path)
-            sheet = workbook.active
-            
-            dispimg_mappings = {}
-            
-            # 找到设备图片列
-            image_col_index = None
-            for col in range(1, sheet.max_column + 1):
-                header = sheet.cell(row=1, column=col).value
-                if header and '图片' in str(header):
-                    image_col_index = col
-                    print(f"找到设备图片列: 第{col}列 - {header}")
-                    break
-            
-            if not image_col_index:
-                print("未找到设备图片列")
-                return {}
-            
-            # 分析所有行的DISPIMG公式
-            for row in range(2, sheet.max_row + 1):
-                # 获取PDID（第1列）
-                pdid_cell = sheet.cell(row=row, column=1)
-                pdid = pdid_cell.value if pdid_cell.value else ""
+            # 只读模式逐行流式读取（保留公式文本，不使用data_only）
+            workbook = openpyxl.load_workbook(self.excel_path, read_only=True)
+            try:
+                sheet = workbook.active
+                rows = sheet.iter_rows(values_only=True)
                 
-                # 获取设备简称（第4列）
-                device_short_cell = sheet.cell(row=row, column=4)
-                device_short = device_short_cell.value if device_short_cell.value else ""
+                dispimg_mappings = {}
                 
-                # 获取图片单元格
-                image_cell = sheet.cell(row=row, column=image_col_index)
+                # 找到设备图片列
+                image_col_index = None
+                for col, header in enumerate(next(rows, ()), 1):
+                    if header and '图片' in str(header):
+                        image_col_index = col
+                        print(f"找到设备图片列: 第{col}列 - {header}")
+                        break
                 
-                if image_cell.value and 'DISPIMG' in str(image_cell.value):
-                    # 提取图片ID
-                    formula = str(image_cell.value)
-                    # 增强正则表达式，支持更多WPS格式变体
-                    # 标准格式: DISPIMG("ID_...",1)
-                    # WPS格式1: =_xlfn.DISPIMG("ID_...",1)
-                    # WPS格式2: =DISPIMG("ID_...",1)
-                    # WPS格式3: DISPIMG("ID_...", 1) (带空格)
-                    match = re.search(r'(?:=_?_?xlfn\.)?DISPIMG\s*\(\s*"([^"]+)"\s*,\s*\d+\s*\)', formula)
+                if not image_col_index:
+                    print("未找到设备图片列")
+                    return {}
+                
+                # 行尾的空单元格可能不在行数据中，补齐到需要读取的列
+                row_width = max(4, image_col_index)
+                
+                # 分析所有行的DISPIMG公式
+                for row, values in enumerate(rows, 2):
+                    values = tuple(values) + (None,) * (row_width - len(values))
                     
-                    if match:
-                        image_id = match.group(1)
-                        
-                        # 生成正确的单元格引用（L列，第12列）
-                        cell_reference = f"L{row}"
-                        
-                        dispimg_mappings[row] = {
-                            'pdid': str(pdid).strip() if pdid else "",
-                            'device_name': str(device_short).strip() if device_short else "",
-                            'dispimg_formula': formula.strip(),
-                            'image_id': image_id,
-                            'row_number': row,
-                            'cell_reference': cell_reference
-                        }
+                    # 获取PDID（第1列）
+                    pdid = values[0] if values[0] else ""
+                    
+                    # 获取设备简称（第4列）
+                    device_short = values[3] if values[3] else ""
+                    
+                    # 获取图片单元格
+                    image_value = values[image_col_index - 1]
+                    
+                    if image_value and 'DISPIMG' in str(image_value):
+                        # 提取图片ID
+                        formula = str(image_value)
+                        # 增强正则表达式，支持更多WPS格式变体
+                        # 标准格式: DISPIMG("ID_...",1)
+                        # WPS格式1: =_xlfn.DISPIMG("ID_...",1)
+                        # WPS格式2: =DISPIMG("ID_...",1)
+                        # WPS格式3: DISPIMG("ID_...", 1) (带空格)
+                        match = re.search(r'(?:=_?_?xlfn\.)?DISPIMG\s*\(\s*"([^"]+)"\s*,\s*\d+\s*\)', formula)
                         
-                        print(f"行{row}: PDID={pdid}, 设备简称={device_short}, DISPIMG图片ID={image_id}, 单元格={cell_reference}")
-                    else:
-                        print(f"行{row}: 无法解析DISPIMG公式: {formula}")
-            
-            workbook.close()
+                        if match:
+                            image_id = match.group(1)
+                            
+                            # 生成正确的单元格引用（L列，第12列）
+                            cell_reference = f"L{row}"
+                            
+                            dispimg_mappings[row] = {
+                                'pdid': str(pdid).strip() if pdid else "",
+                                'device_name': str(device_short).strip() if device_short else "",
+                                'dispimg_formula': formula.strip(),
+                                'image_id': image_id,
+                                'row_number': row,
+                                'cell_reference': cell_reference
+                            }
+                            
+                            print(f"行{row}: PDID={pdid}, 设备简称={device_short}, DISPIMG图片ID={image_id}, 单元格={cell_reference}")
+                        else:
+                            print(f"行{row}: 无法解析DISPIMG公式: {formula}")
+            finally:
+                workbook.close()
             return dispimg_mappings
             
         except Exception as e:
@@ -6,6 +6,7 @@
 """
 
 import os
+from collections import Counter
 import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
 from template_loader import TemplateLoader, load_and_validate_template
@@ -140,11 +141,9 @@ class EnhancedProcurementGenerator:
                 return {}
             
             # 计算设备数量（基于PDID标签的出现次数）
-            device_counts = {}
-            for slide_idx, labels in pdid_labels.items():
-                for label in labels:
-                    pdid_value = label['pdid']
-                    device_counts[pdid_value] = device_counts.get(pdid_value, 0) + 1
+            device_counts = Counter(
+                label['pdid'] for labels in pdid_labels.values() for label in labels
+            )
             
             # 构建PDID数据
             pdid_data = {
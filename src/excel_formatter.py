@@ -234,13 +234,11 @@ def test_excel_formatter():
     ]
     
     # 添加标题行
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=1, column=col, value=header)
+    ws.append(headers)
     
     # 添加数据行
-    for row, row_data in enumerate(data, 2):
-        for col, value in enumerate(row_data, 1):
-            ws.cell(row=row, column=col, value=value)
+    for row_data in data:
+        ws.append(row_data)
     
     # 应用格式美化
     formatter = ExcelFormatter()
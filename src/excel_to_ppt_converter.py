@@ -15,8 +15,20 @@ import os
 import requests
 from PIL import Image
 import io
+import re
 from urllib.parse import urlparse
 
+from presentation_cache import save_presentation
+
+# 设备简称中的开关键数，如 领普二键开关 / 2键开关，映射为识别工具使用的形状名称
+SWITCH_KEY_PATTERN = re.compile(r'([一二三四1-4])键')
+SWITCH_SHAPE_NAMES = {
+    '一': 'smart_home_switch_1', '1': 'smart_home_switch_1',
+    '二': 'smart_home_switch_2', '2': 'smart_home_switch_2',
+    '三': 'smart_home_switch_3', '3': 'smart_home_switch_3',
+    '四': 'smart_home_switch_4', '4': 'smart_home_switch_4',
+}
+
 class ExcelToPPTConverter:
     """Excel到PPT模具库转换器"""
     
@@ -843,36 +855,34 @@ class ExcelToPPTConverter:
             list: 产品数据列表
         """
         try:
-            workbook = openpyxl.load_workbook(excel_path)
-            sheet = workbook.active
-            
-            # 读取表头
-            headers = []
-            for col in range(1, sheet.max_column + 1):
-                header = sheet.cell(row=1, column=col).value
-                headers.append(header if header else f"列{col}")
-            
-            # 读取数据
-            products = []
-            for row in range(2, sheet.max_row + 1):
-                product = {}
-                valid_row = False
+            # 只读模式逐行流式读取单元格值，不构建样式等可编辑对象
+            # 不使用data_only，图片列中的DISPIMG公式文本后续需要解析
+            workbook = openpyxl.load_workbook(excel_path, read_only=True)
+            try:
+                sheet = workbook.active
+                rows = sheet.iter_rows(values_only=True)
                 
-                for col, header in enumerate(headers, 1):
-                    value = sheet.cell(row=row, column=col).value
-                    product[header] = value
-                    
-                    # 检查是否有效行（至少有一个非空值）
-                    if value and not valid_row:
-                        valid_row = True
+                # 读取表头
+                headers = [header if header else f"列{col}" for col, header in enumerate(next(rows, ()), 1)]
                 
-                if valid_row:
-                    # 检查是否启用
-                    is_enabled = product.get('是否启用', True)
-                    if is_enabled in [True, '是', '启用', '1', 1]:
-                        # 不再处理图片，将在generate_ppt_from_excel中使用新的图片处理流程
-                        products.append(product)
-            
+                # 读取数据
+                products = []
+                for values in rows:
+                    # 行尾的空单元格可能不在行数据中，补齐为None
+                    values = tuple(values) + (None,) * (len(headers) - len(values))
+                    product = dict(zip(headers, values))
+                    
+                    # 检查是否有效行（表头范围内至少有一个非空值，超出表头的单元格不计入）
+                    valid_row = any(values[:len(headers)])
+                    
+                    if valid_row:
+                        # 检查是否启用
+                        is_enabled = product.get('是否启用', True)
+                        if is_enabled in [True, '是', '启用', '1', 1]:
+                            # 不再处理图片，将在generate_ppt_from_excel中使用新的图片处理流程
+                            products.append(product)
+            finally:
+                workbook.close()
             print(f"从Excel读取到 {len(products)} 个启用的产品")
             return products
             
@@ -1157,7 +1167,7 @@ class ExcelToPPTConverter:
         
         # 5. 保存PPT
         try:
-            prs.save(ppt_path)
+            save_presentation(prs, ppt_path)
             print(f"PPT模具库生成成功: {ppt_path}")
             print(f"总计生成 {len(prs.slides)} 张幻灯片")
             return True
@@ -1176,18 +1186,9 @@ class ExcelToPPTConverter:
             # 生成与识别工具兼容的智能标记
             # 识别工具支持格式：smart_home_switch_2 或 switch_2
             if "开关" in product_type or "switch" in product_type.lower():
-                # 从设备简称中提取开关键数
-                if "一键" in short_name or "1键" in short_name:
-                    shape.name = "smart_home_switch_1"
-                elif "二键" in short_name or "2键" in short_name:
-                    shape.name = "smart_home_switch_2"
-                elif "三键" in short_name or "3键" in short_name:
-                    shape.name = "smart_home_switch_3"
-                elif "四键" in short_name or "4键" in short_name:
-                    shape.name = "smart_home_switch_4"
-                else:
-                    # 默认使用简化格式
-                    shape.name = "switch_1"
+                # 从设备简称中提取开关键数，未识别时默认使用简化格式
+                match = SWITCH_KEY_PATTERN.search(short_name)
+                shape.name = SWITCH_SHAPE_NAMES[match.group(1)] if match else "switch_1"
             else:
                 # 其他产品类型使用简化格式
                 shape.name = f"smart_home_{product_type}"
@@ -1476,8 +1477,7 @@ class ExcelToPPTConverter:
             "渠道", "采购链接", "设备图片"
         ]
         
-        for col, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col, value=header)
+        sheet.append(headers)
         
         # 示例数据
         sample_data = [
@@ -1488,12 +1488,14 @@ class ExcelToPPTConverter:
             ["控制器", "智能网关", "智能网关", "是", 299, "颜工", "WiFi+Zigbee", "台", "电商", "https://example.com/gateway", "https://example.com/gateway.jpg"]
         ]
         
-        for row, data in enumerate(sample_data, 2):
-            for col, value in enumerate(data, 1):
-                sheet.cell(row=row, column=col, value=value)
+        for data in sample_data:
+            sheet.append(data)
         
-        # 保存文件
-        workbook.save(excel_path)
+        # 保存文件：示例文件很小，先在内存中生成再一次性写入磁盘
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        with open(excel_path, 'wb') as f:
+            f.write(buffer.getbuffer())
         print(f"示例Excel文件已创建: {excel_path}")
 
 # 使用示例
@@ -5,10 +5,18 @@
 支持识别真组结构中的产品信息
 """
 
-from pptx import Presentation
-from pptx.util import Inches
-import pandas as pd
 import os
+import re
+from collections import defaultdict
+
+from product_library_cache import load_product_records
+from presentation_cache import load_presentation
+
+# 每英寸对应的EMU数（PPT内部长度单位）
+EMU_PER_INCH = 914400
+
+# 格式: smart_home_switch_1_lp_id，取smart_home_之后的前两段或三段
+PRODUCT_ID_PATTERN = re.compile(r'smart_home_([^_]*_[^_]*(?:_[^_]*)?)')
 
 def read_excel_product_library(excel_path):
     """从Excel模具库读取产品信息"""
@@ -16,15 +24,16 @@ def read_excel_product_library(excel_path):
         print(f"❌ Excel模具库文件不存在: {excel_path}")
         return {}
     
-    df = pd.read_excel(excel_path)
+    # 只做字典查找，用openpyxl只读模式读取即可，无需加载pandas
     product_library = {}
     
-    for index, row in df.iterrows():
-        product_id = row.get('产品ID', '')
-        if pd.notna(product_id) and product_id:
+    for row in load_product_records(excel_path):
+        product_id = row.get('产品ID')
+        if product_id:
+            price = row.get('单价')
             product_library[product_id] = {
                 "name": row.get('设备名称', ''),
-                "price": int(row.get('单价', 0)) if pd.notna(row.get('单价')) else 0,
+                "price": int(price) if price is not None else 0,
                 "brand": row.get('品牌', ''),
                 "model": row.get('主规格', ''),
                 "category": row.get('设备品类', '')
@@ -35,17 +44,31 @@ def read_excel_product_library(excel_path):
 
 def extract_product_id_from_shape_name(shape_name):
     """从形状名称提取产品ID"""
-    if not shape_name or 'smart_home_' not in shape_name:
+    if not shape_name:
         return None
     
-    # 格式: smart_home_switch_1_lp_id
-    parts = shape_name.split('smart_home_')[1].split('_')
-    if len(parts) >= 3:
-        return f"{parts[0]}_{parts[1]}_{parts[2]}"
-    elif len(parts) >= 2:
-        return f"{parts[0]}_{parts[1]}"
-    
-    return None
+    match = PRODUCT_ID_PATTERN.search(shape_name)
+    return match.group(1) if match else None
+
+def build_product_info(product_id, shapes, library_info):
+    """根据产品组的形状和模具库信息生成产品记录"""
+    product_info = library_info.copy()
+    
+    # 获取主形状位置（使用第一个形状）
+    main_shape = shapes[0]
+    
+    product_info.update({
+        "product_id": product_id,
+        "quantity": 1,
+        "slide_number": 2,
+        "position": f"({int(main_shape.left / EMU_PER_INCH)},{int(main_shape.top / EMU_PER_INCH)})",
+        "shape_count": len(shapes),
+        # 形状名称最后一段为类型（main/name/info/id）
+        "shape_types": [shape.name.rpartition('_')[2] for shape in shapes]
+    })
+    
+    product_info["total_price"] = product_info["price"] * product_info["quantity"]
+    return product_info
 
 def scan_ppt_for_product_groups(ppt_path, excel_library_path):
     """扫描PPT文件中的产品组"""
@@ -55,7 +78,7 @@ def scan_ppt_for_product_groups(ppt_path, excel_library_path):
     # 读取产品库
     product_library = read_excel_product_library(excel_library_path)
     
-    prs = Presentation(ppt_path)
+    prs = load_presentation(ppt_path)
     all_products = []
     
     print(f"🔍 扫描PPT文件: {ppt_path}")
@@ -66,39 +89,26 @@ def scan_ppt_for_product_groups(ppt_path, excel_library_path):
         slide = prs.slides[1]
         
         # 按产品ID分组形状
-        product_groups = {}
+        product_groups = defaultdict(list)
         for shape in slide.shapes:
-            if hasattr(shape, 'name') and shape.name:
-                product_id = extract_product_id_from_shape_name(shape.name)
+            shape_name = getattr(shape, 'name', None)
+            if shape_name:
+                product_id = extract_product_id_from_shape_name(shape_name)
                 if product_id:
-                    if product_id not in product_groups:
-                        product_groups[product_id] = []
                     product_groups[product_id].append(shape)
         
         print(f"📦 识别到 {len(product_groups)} 个产品组")
         
-        # 处理每个产品组
-        for product_id, shapes in product_groups.items():
-            if product_id in product_library:
-                product_info = product_library[product_id].copy()
-                
-                # 获取主形状位置（使用第一个形状）
-                main_shape = shapes[0]
-                
-                product_info.update({
-                    "product_id": product_id,
-                    "quantity": 1,
-                    "slide_number": 2,
-                    "position": f"({int(main_shape.left/Inches(1))},{int(main_shape.top/Inches(1))})",
-                    "shape_count": len(shapes),
-                    "shape_types": [shape.name.split('_')[-1] for shape in shapes]
-                })
-                
-                product_info["total_price"] = product_info["price"] * product_info["quantity"]
-                all_products.append(product_info)
-                
-                print(f"   ✅ 产品组 {product_id}: {product_info['name']} - ¥{product_info['price']}")
-                print(f"      包含 {len(shapes)} 个形状: {', '.join([shape.name.split('_')[-1] for shape in shapes])}")
+        # 处理每个产品组（列表推导式一次构建结果列表）
+        all_products = [
+            build_product_info(product_id, shapes, product_library[product_id])
+            for product_id, shapes in product_groups.items()
+            if product_id in product_library
+        ]
+        
+        for product_info in all_products:
+            print(f"   ✅ 产品组 {product_info['product_id']}: {product_info['name']} - ¥{product_info['price']}")
+            print(f"      包含 {product_info['shape_count']} 个形状: {', '.join(product_info['shape_types'])}")
     
     print(f"📊 总计找到 {len(all_products)} 个智能家居产品")
     return all_products
@@ -115,23 +125,23 @@ def create_product_report(product_data, output_path):
     # 表头
     headers = ["产品ID", "产品名称", "品牌", "单价(元)", "数量", "总价(元)", "形状数量", "形状类型", "位置"]
     
-    for col, header in enumerate(headers, 1):
-        sheet.cell(row=1, column=col, value=header)
+    sheet.append(headers)
     
     # 数据行
-    total_amount = 0
-    for row, product in enumerate(product_data, 2):
-        sheet.cell(row=row, column=1, value=product.get("product_id", ""))
-        sheet.cell(row=row, column=2, value=product.get("name", ""))
-        sheet.cell(row=row, column=3, value=product.get("brand", ""))
-        sheet.cell(row=row, column=4, value=product.get("price", 0))
-        sheet.cell(row=row, column=5, value=product.get("quantity", 1))
-        sheet.cell(row=row, column=6, value=product.get("total_price", 0))
-        sheet.cell(row=row, column=7, value=product.get("shape_count", 0))
-        sheet.cell(row=row, column=8, value=", ".join(product.get("shape_types", [])))
-        sheet.cell(row=row, column=9, value=product.get("position", ""))
-        
-        total_amount += product.get("total_price", 0)
+    for product in product_data:
+        sheet.append((
+            product.get("product_id", ""),
+            product.get("name", ""),
+            product.get("brand", ""),
+            product.get("price", 0),
+            product.get("quantity", 1),
+            product.get("total_price", 0),
+            product.get("shape_count", 0),
+            ", ".join(product.get("shape_types", [])),
+            product.get("position", "")
+        ))
+    
+    total_amount = sum(product.get("total_price", 0) for product in product_data)
     
     # 保存文件
     workbook.save(output_path)
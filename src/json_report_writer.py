@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON报告写出模块
+统一各报告与配置文件的JSON写出格式：两空格缩进、中文不转义、NaN/inf写为null、
+支持numpy数值；安装orjson时使用orjson，否则回退到标准库json，两者输出内容一致
+"""
+
+import json
+import math
+from typing import Any
+
+try:
+    # orjson为Rust实现的JSON序列化库，带缩进输出时比标准库json快得多
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _to_json_compatible(obj: Any) -> Any:
+    """
+    将对象转换为标准库json可直接写出的形式，与orjson的处理方式保持一致
+
+    - NaN/inf 转换为None（orjson写为null，标准库json会写出非法的NaN/Infinity）
+    - numpy数组与标量转换为Python列表与数值
+    - 字典的非字符串键保持原样，由json按其规则转换为字符串
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {_to_json_compatible(key): _to_json_compatible(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_json_compatible(item) for item in obj]
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return _to_json_compatible(obj.tolist())
+        if isinstance(obj, np.generic):
+            return _to_json_compatible(obj.item())
+    return obj
+
+
+def dump_json(obj: Any, path: str):
+    """
+    将对象写出为UTF-8编码的JSON文件
+
+    Args:
+        obj: 待写出的数据
+        path: 输出文件路径
+    """
+    if orjson is not None:
+        # orjson直接输出UTF-8字节，中文不转义，与ensure_ascii=False一致
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        with open(path, 'wb') as f:
+            f.write(data)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_to_json_compatible(obj), f, ensure_ascii=False, indent=2)
@@ -9,6 +9,8 @@ import os
 import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
 
+from product_library_cache import load_product_library
+
 
 class MoldLibraryLoader:
     """模具库加载器类"""
@@ -17,6 +19,7 @@ class MoldLibraryLoader:
         """初始化模具库加载器"""
         self.dataframe: Optional[pd.DataFrame] = None
         self.mold_info: Dict[str, Any] = {}
+        self.product_index: Dict[Any, Dict[str, Any]] = {}
         
     def load_mold_library(self, excel_path: str) -> bool:
         """
@@ -41,7 +44,7 @@ class MoldLibraryLoader:
             
             # 加载Excel文件
             print(f"🔍 加载模具库文件: {excel_path}")
-            self.dataframe = pd.read_excel(excel_path)
+            self.dataframe = load_product_library(excel_path)
             
             # 分析模具库结构
             if not self._analyze_mold_library():
@@ -76,9 +79,14 @@ class MoldLibraryLoader:
                 'brands': []
             }
             
-            # 提取产品ID
+            # 提取产品ID，并建立产品ID索引（重复ID取第一行）
+            self.product_index = {}
             if '产品ID' in self.dataframe.columns:
                 self.mold_info['product_ids'] = self.dataframe['产品ID'].dropna().unique().tolist()
+                
+                indexed = self.dataframe.dropna(subset=['产品ID']).drop_duplicates('产品ID', keep='first')
+                indexed = indexed.astype(object).where(indexed.notna(), None)
+                self.product_index = indexed.set_index('产品ID', drop=False).to_dict('index')
             
             # 提取设备品类
             if '设备品类' in self.dataframe.columns:
@@ -134,20 +142,15 @@ class MoldLibraryLoader:
             return None
         
         try:
-            # 查找匹配的产品ID
-            product_row = self.dataframe[self.dataframe['产品ID'] == product_id]
+            # 通过产品ID索引查找（NaN值已在建索引时清理）
+            product_info = self.product_index.get(product_id)
             
-            if len(product_row) == 0:
+            if product_info is None:
                 print(f"⚠️ 未找到产品ID为 {product_id} 的产品")
                 return None
             
-            # 转换为字典格式
-            product_info = product_row.iloc[0].to_dict()
-            
-            # 清理NaN值
-            for key, value in product_info.items():
-                if pd.isna(value):
-                    product_info[key] = None
+            # 返回副本，避免调用方修改索引
+            product_info = product_info.copy()
             
             print(f"🔍 找到产品ID {product_id} 的信息")
             return product_info
@@ -4,10 +4,16 @@
 pdid标签提取模块 - 专门处理pdid: 1格式的标签提取
 """
 
-from pptx import Presentation
 import re
 from typing import List, Dict, Optional
 
+from presentation_cache import load_presentation
+
+# 严格按照项目规则匹配：pdid: 数字（冒号后有一个空格）
+PDID_PATTERN = re.compile(r'pdid:\s*(\d+)', re.IGNORECASE)
+# 宽松匹配（允许冒号前后的空格变化）
+PDID_PATTERN_LOOSE = re.compile(r'pdid\s*:\s*(\d+)', re.IGNORECASE)
+
 
 class PDIDExtractor:
     """pdid标签提取器"""
@@ -30,7 +36,7 @@ class PDIDExtractor:
             bool: 是否成功加载
         """
         try:
-            self.presentation = Presentation(self.ppt_path)
+            self.presentation = load_presentation(self.ppt_path)
             print(f"✅ 成功加载PPT文件: {self.ppt_path}")
             print(f"📊 幻灯片数量: {len(self.presentation.slides)}")
             return True
@@ -61,12 +67,12 @@ class PDIDExtractor:
             
             # 检查所有形状，包括嵌套的组合形状
             for shape in slide.shapes:
-                shape_name = shape.name if hasattr(shape, 'name') else ""
+                shape_name = getattr(shape, 'name', "")
                 
                 # 检查形状的文本内容
                 if hasattr(shape, 'has_text_frame') and shape.has_text_frame:
                     try:
-                        text = shape.text.strip() if shape.text else ""
+                        text = (shape.text or "").strip()
                         if text:
                             # 精准匹配pdid格式：pdid: 数字
                             pdid_values = self._match_pdid_format(text)
@@ -101,7 +107,7 @@ class PDIDExtractor:
                         # 检查子形状的文本内容
                         if hasattr(sub_shape, 'has_text_frame') and sub_shape.has_text_frame:
                             try:
-                                text = sub_shape.text.strip() if sub_shape.text else ""
+                                text = (sub_shape.text or "").strip()
                                 if text:
                                     # 精准匹配pdid格式：pdid: 数字
                                     pdid_values = self._match_pdid_format(text)
@@ -199,16 +205,14 @@ class PDIDExtractor:
         pdid_values = []
         
         # 严格按照项目规则匹配：pdid: 数字（冒号后有一个空格）
-        pdid_pattern = r'pdid:\s*(\d+)'
-        match = re.search(pdid_pattern, text, re.IGNORECASE)
+        match = PDID_PATTERN.search(text)
         if match:
             pdid_values.append(int(match.group(1)))
             print(f"      🔍 匹配到标准pdid格式: {match.group(0)}")
         
         # 如果标准格式未匹配，尝试宽松匹配（允许空格变化）
         if not pdid_values:
-            pdid_pattern_loose = r'pdid\s*:\s*(\d+)'
-            match_loose = re.search(pdid_pattern_loose, text, re.IGNORECASE)
+            match_loose = PDID_PATTERN_LOOSE.search(text)
             if match_loose:
                 pdid_values.append(int(match_loose.group(1)))
                 print(f"      🔍 匹配到宽松pdid格式: {match_loose.group(0)}")
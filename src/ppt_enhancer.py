@@ -5,14 +5,22 @@ PPT模具库改进模块 - 任务3：创建PPT模具库改进模块
 为PPT中的设备组添加pdid标签
 """
 
-from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.dml.color import RGBColor
 import json
 import os
+import re
 from typing import Dict, List, Tuple
 
+from presentation_cache import open_presentation, save_presentation
+
+# 形状名称中的开关键数，如 smart_home_switch_2_lp
+SWITCH_NAME_PATTERN = re.compile(r'switch_([1-4])')
+# 文本中的开关键数，如 领普二键开关 / 2键开关
+SWITCH_TEXT_PATTERN = re.compile(r'([一二三四1-4])键')
+SWITCH_KEY_COUNTS = {'一': 1, '二': 2, '三': 3, '四': 4, '1': 1, '2': 2, '3': 3, '4': 4}
+
 class PPTEnhancer:
     """PPT模具库改进器"""
     
@@ -37,7 +45,7 @@ class PPTEnhancer:
             bool: 是否成功加载
         """
         try:
-            self.presentation = Presentation(self.ppt_path)
+            self.presentation = open_presentation(self.ppt_path)
             print(f"✅ 成功加载PPT文件: {self.ppt_path}")
             print(f"📊 幻灯片数量: {len(self.presentation.slides)}")
             return True
@@ -84,21 +92,27 @@ class PPTEnhancer:
             # 查找设备组
             device_shapes = []
             for shape in slide.shapes:
-                shape_info = {
+                name = shape.name
+                has_text = shape.has_text_frame
+                text = shape.text if has_text else ""
+                
+                # 判断是否为设备组相关形状（'smart_home_switch'已包含在'switch'中）
+                if 'switch' in name.lower():
+                    print(f"   🔍 发现设备组形状: {name}")
+                elif has_text and ('开关' in text or 'switch' in text.lower()):
+                    print(f"   🔍 发现设备组文本: {text[:30]}...")
+                else:
+                    continue
+                
+                # 记录所在幻灯片，添加标签时无需再次遍历查找
+                device_shapes.append({
                     'shape': shape,
-                    'name': shape.name,
+                    'slide': slide,
+                    'name': name,
                     'type': type(shape).__name__,
-                    'has_text': shape.has_text_frame,
-                    'text': shape.text if shape.has_text_frame else ""
-                }
-                
-                # 判断是否为设备组相关形状
-                if 'smart_home_switch' in shape.name.lower() or 'switch' in shape.name.lower():
-                    device_shapes.append(shape_info)
-                    print(f"   🔍 发现设备组形状: {shape.name}")
-                elif shape.has_text_frame and ('开关' in shape.text or 'switch' in shape.text.lower()):
-                    device_shapes.append(shape_info)
-                    print(f"   🔍 发现设备组文本: {shape.text[:30]}...")
+                    'has_text': has_text,
+                    'text': text
+                })
             
             device_groups[slide_idx] = device_shapes
             print(f"   📊 本页设备组数量: {len(device_shapes)}")
@@ -118,25 +132,17 @@ class PPTEnhancer:
         shape_name = shape_info['name'].lower()
         shape_text = shape_info['text'].lower()
         
-        # 根据形状名称匹配产品ID
-        if 'switch_1' in shape_name:
-            return 1 if 'lp' in shape_name else 5
-        elif 'switch_2' in shape_name:
-            return 2 if 'lp' in shape_name else 6
-        elif 'switch_3' in shape_name:
-            return 3 if 'lp' in shape_name else 7
-        elif 'switch_4' in shape_name:
-            return 4 if 'lp' in shape_name else 8
+        # 根据形状名称匹配产品ID（领普为1-4，其余品牌为5-8）
+        match = SWITCH_NAME_PATTERN.search(shape_name)
+        if match:
+            key_count = int(match.group(1))
+            return key_count if 'lp' in shape_name else key_count + 4
         
         # 根据文本内容匹配
-        if '一键' in shape_text or '1键' in shape_text:
-            return 1 if '领普' in shape_text else 5
-        elif '二键' in shape_text or '2键' in shape_text:
-            return 2 if '领普' in shape_text else 6
-        elif '三键' in shape_text or '3键' in shape_text:
-            return 3 if '领普' in shape_text else 7
-        elif '四键' in shape_text or '4键' in shape_text:
-            return 4 if '领普' in shape_text else 8
+        match = SWITCH_TEXT_PATTERN.search(shape_text)
+        if match:
+            key_count = SWITCH_KEY_COUNTS[match.group(1)]
+            return key_count if '领普' in shape_text else key_count + 4
         
         return 0
     
@@ -154,15 +160,13 @@ class PPTEnhancer:
         shape = shape_info['shape']
         
         try:
-            # 获取幻灯片对象 - 需要遍历幻灯片来找到包含该形状的幻灯片
-            slide = None
-            for slide_idx, current_slide in enumerate(self.presentation.slides):
-                for slide_shape in current_slide.shapes:
-                    if slide_shape == shape:
+            # 获取幻灯片对象 - analyze_slides已记录，否则遍历幻灯片查找包含该形状的幻灯片
+            slide = shape_info.get('slide')
+            if slide is None:
+                for current_slide in self.presentation.slides:
+                    if any(slide_shape == shape for slide_shape in current_slide.shapes):
                         slide = current_slide
                         break
-                if slide:
-                    break
             
             if slide is None:
                 print(f"   ❌ 无法找到包含形状 {shape_info['name']} 的幻灯片")
@@ -266,7 +270,7 @@ class PPTEnhancer:
             output_path = self.ppt_path
         
         try:
-            self.presentation.save(output_path)
+            save_presentation(self.presentation, output_path)
             print(f"✅ 改进后的PPT文件已保存: {output_path}")
             return True
         except Exception as e:
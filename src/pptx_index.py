@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPT形状索引模块
+一次解析pptx中每张幻灯片的顶层形状（名称、是否为组、文本），
+同一进程内按(文件路径, 修改时间)缓存，并按文件内容哈希以JSON落盘到用户缓存目录，
+各识别/统计脚本共用同一份索引，不再各自遍历幻灯片XML
+"""
+
+import os
+import json
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from lxml import etree
+
+from disk_cache import cache_file_path, read_cache, write_cache
+from pptx_xml_reader import NAMESPACES, read_slide_xmls
+
+CACHE_NAMESPACE = 'shapes'
+# 索引结构变化时递增，使旧的磁盘缓存失效
+INDEX_VERSION = 1
+
+_P = '{%s}' % NAMESPACES['p']
+_A = '{%s}' % NAMESPACES['a']
+
+
+def shape_xml_text(sp) -> str:
+    """按python-pptx的规则拼接p:sp中的文本：段落以换行分隔，a:br视为垂直制表符"""
+    paragraphs = []
+    for p in sp.iterfind(f'{_P}txBody/{_A}p'):
+        parts = []
+        for child in p:
+            if child.tag in (f'{_A}r', f'{_A}fld'):
+                parts.append(child.findtext(f'{_A}t') or '')
+            elif child.tag == f'{_A}br':
+                parts.append('\v')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+
+def iter_shape_texts(elements):
+    """递归遍历形状XML（含嵌套组），逐个产出去除首尾空白后的非空文本"""
+    for element in elements:
+        if element.tag == f'{_P}grpSp':
+            yield from iter_shape_texts(element)
+        elif element.tag == f'{_P}sp':
+            text = shape_xml_text(element).strip()
+            if text:
+                yield text
+
+
+def index_slide(slide_xml: bytes) -> List[Dict[str, Any]]:
+    """
+    解析单张幻灯片XML
+
+    Args:
+        slide_xml: 幻灯片XML字节串
+
+    Returns:
+        List[Dict[str, Any]]: 顶层形状记录，包含name、is_group和texts（组内为全部子形状文本）
+    """
+    sp_tree = etree.fromstring(slide_xml).find(f'{_P}cSld/{_P}spTree')
+
+    shapes = []
+    for element in sp_tree:
+        # 形状的第一个子元素（nvSpPr/nvGrpSpPr/nvPicPr等）中的cNvPr记录了名称；
+        # spTree自身的nvGrpSpPr/grpSpPr不是形状，这里自然会被跳过
+        c_nv_pr = element.find(f'*/{_P}cNvPr')
+        if c_nv_pr is None:
+            continue
+        shapes.append({
+            'name': c_nv_pr.get('name', ''),
+            'is_group': element.tag == f'{_P}grpSp',
+            'texts': list(iter_shape_texts([element])),
+        })
+    return shapes
+
+
+def build_shape_index(ppt_path: str) -> List[List[Dict[str, Any]]]:
+    """
+    解析PPT中所有幻灯片的顶层形状，不使用缓存
+
+    Args:
+        ppt_path: PPT文件路径
+
+    Returns:
+        List[List[Dict[str, Any]]]: 按幻灯片顺序排列的形状记录列表
+    """
+    # 单张幻灯片解析约0.25ms，直接在当前进程中逐张解析：
+    # 进程池的启动开销远大于收益，且打包为exe后子进程会重新启动GUI
+    return [index_slide(slide_xml) for slide_xml in read_slide_xmls(ppt_path)]
+
+
+def _is_valid_index(index) -> bool:
+    """检查磁盘缓存中读出的索引是否为build_shape_index产出的结构"""
+    if not isinstance(index, list):
+        return False
+    for shapes in index:
+        if not isinstance(shapes, list):
+            return False
+        for shape in shapes:
+            if not (isinstance(shape, dict)
+                    and isinstance(shape.get('name'), str)
+                    and isinstance(shape.get('is_group'), bool)
+                    and isinstance(shape.get('texts'), list)
+                    and all(isinstance(text, str) for text in shape['texts'])):
+                return False
+    return True
+
+
+@lru_cache(maxsize=4)
+def _read_shape_index(ppt_path: str, mtime_ns: int) -> List[List[Dict[str, Any]]]:
+    """读取形状索引（优先使用磁盘缓存），mtime_ns仅作为缓存键的一部分"""
+    cache_path = cache_file_path(CACHE_NAMESPACE, ppt_path, f".v{INDEX_VERSION}.json")
+    data = read_cache(cache_path)
+    if data is not None:
+        try:
+            index = json.loads(data)
+        except ValueError:
+            # 缓存已损坏，重新解析PPT
+            index = None
+        if _is_valid_index(index):
+            return index
+
+    index = build_shape_index(ppt_path)
+    write_cache(cache_path, json.dumps(index, ensure_ascii=False).encode('utf-8'))
+    return index
+
+
+def load_shape_index(ppt_path: str) -> List[List[Dict[str, Any]]]:
+    """
+    读取PPT形状索引，文件未修改时直接复用缓存结果
+
+    返回的索引在调用方之间共享，只能用于读取
+
+    Args:
+        ppt_path: PPT文件路径
+
+    Returns:
+        List[List[Dict[str, Any]]]: 按幻灯片顺序排列的形状记录列表
+    """
+    ppt_path = os.path.abspath(ppt_path)
+    mtime_ns = os.stat(ppt_path).st_mtime_ns
+    return _read_shape_index(ppt_path, mtime_ns)
+
+
+def clear_shape_index_cache():
+    """清空形状索引的进程内缓存"""
+    _read_shape_index.cache_clear()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPT XML快速读取模块
+直接从pptx压缩包中按放映顺序读取幻灯片XML，
+不构建python-pptx的完整形状对象树
+"""
+
+import posixpath
+import zipfile
+from typing import Dict, List
+
+from lxml import etree
+
+NAMESPACES = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+}
+
+_RELATIONSHIP_TAG = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+_R_ID = '{%s}id' % NAMESPACES['r']
+
+
+def get_slide_part_names(zf: zipfile.ZipFile) -> List[str]:
+    """
+    按演示文稿中的放映顺序获取幻灯片XML在压缩包中的路径
+
+    Args:
+        zf: 已打开的pptx压缩包
+
+    Returns:
+        List[str]: 幻灯片XML路径列表，如 ppt/slides/slide1.xml
+    """
+    presentation = etree.fromstring(zf.read('ppt/presentation.xml'))
+    rels = etree.fromstring(zf.read('ppt/_rels/presentation.xml.rels'))
+
+    targets: Dict[str, str] = {rel.get('Id'): rel.get('Target') for rel in rels.iter(_RELATIONSHIP_TAG)}
+
+    part_names = []
+    for sld_id in presentation.iterfind('p:sldIdLst/p:sldId', NAMESPACES):
+        target = targets.get(sld_id.get(_R_ID))
+        if not target:
+            continue
+        if target.startswith('/'):
+            part_names.append(target.lstrip('/'))
+        else:
+            part_names.append(posixpath.normpath(posixpath.join('ppt', target)))
+
+    return part_names
+
+
+def read_slide_xmls(ppt_path: str) -> List[bytes]:
+    """
+    按放映顺序读取每张幻灯片的原始XML
+
+    Args:
+        ppt_path: PPT文件路径
+
+    Returns:
+        List[bytes]: 幻灯片XML字节串列表
+    """
+    with zipfile.ZipFile(ppt_path) as zf:
+        return [zf.read(part_name) for part_name in get_slide_part_names(zf)]
+
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PPT缓存模块
+按(文件路径, 修改时间)缓存python-pptx解析出的Presentation对象，
+同一进程内多个识别/统计步骤读取同一个PPT时只解析一次
+"""
+
+import os
+from functools import lru_cache
+
+import pptx.oxml
+from lxml import etree
+from pptx import Presentation
+
+# 读写pptx时使用的文件缓冲区大小，默认的8KB对几MB的zip包来说过小
+IO_BUFFER_SIZE = 1 << 20
+
+
+def _configure_oxml_parser():
+    """
+    替换python-pptx的全局XML解析器：保留其自定义元素类查找，
+    关闭xml:id哈希表收集（pptx中不使用），并放开大文档的节点/深度限制
+    """
+    parser = etree.XMLParser(
+        remove_blank_text=True,
+        resolve_entities=False,
+        collect_ids=False,
+        huge_tree=True,
+    )
+    parser.set_element_class_lookup(pptx.oxml.element_class_lookup)
+    # pptx.oxml.parse_xml在每次调用时读取该模块属性，替换后对所有部件生效
+    pptx.oxml.oxml_parser = parser
+
+
+_configure_oxml_parser()
+
+
+def open_presentation(ppt_path: str):
+    """
+    以1MB读缓冲区解析PPT文件，不使用缓存，返回的对象可以修改
+
+    python-pptx在构造时即读入全部部件，文件在返回前关闭
+
+    Args:
+        ppt_path: PPT文件路径
+
+    Returns:
+        Presentation: 新解析的Presentation对象
+    """
+    with open(ppt_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+        return Presentation(f)
+
+
+def save_presentation(presentation, output_path: str):
+    """
+    以1MB写缓冲区保存PPT文件
+
+    Args:
+        presentation: Presentation对象
+        output_path: 输出文件路径
+    """
+    with open(output_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+        presentation.save(f)
+
+
+@lru_cache(maxsize=4)
+def _read_presentation(ppt_path: str, mtime_ns: int):
+    """解析PPT文件，mtime_ns仅作为缓存键的一部分"""
+    return open_presentation(ppt_path)
+
+
+def load_presentation(ppt_path: str):
+    """
+    读取PPT文件，文件未修改时直接复用已解析的对象
+
+    返回的对象在调用方之间共享，只能用于读取；
+    需要修改并保存PPT的场景（如PPTEnhancer）应使用open_presentation(ppt_path)
+
+    Args:
+        ppt_path: PPT文件路径
+
+    Returns:
+        Presentation: 共享的只读Presentation对象
+    """
+    ppt_path = os.path.abspath(ppt_path)
+    mtime_ns = os.stat(ppt_path).st_mtime_ns
+    return _read_presentation(ppt_path, mtime_ns)
+
+
+def clear_presentation_cache():
+    """清空PPT缓存"""
+    _read_presentation.cache_clear()
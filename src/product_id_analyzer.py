@@ -6,9 +6,14 @@
 """
 
 import os
+import sys
 import pandas as pd
-from pptx import Presentation
 import re
+from collections import Counter, defaultdict
+
+from product_library_cache import load_product_library
+from presentation_cache import load_presentation
+from report_excel_writer import write_report_excel
 
 def analyze_by_product_id(ppt_file_path):
     """通过产品ID识别PPT中的设备"""
@@ -27,161 +32,123 @@ def analyze_by_product_id(ppt_file_path):
         print("❌ Excel模具库文件不存在")
         return None
     
-    df = pd.read_excel(excel_path)
+    df = load_product_library(excel_path)
     print(f"📊 模具库包含 {len(df)} 个产品")
     
-    # 创建产品ID映射
-    product_mapping = {}
-    for _, row in df.iterrows():
-        product_id = row['产品ID']
-        product_mapping[product_id] = {
-            '设备名称': row['设备名称'],
-            '品牌': row['品牌'],
-            '主规格': row['主规格'],
-            '设备品类': row['设备品类'],
-            '单价': row['单价']
-        }
+    # 创建产品ID映射（重复的产品ID以最后一行为准）
+    product_mapping = (
+        df.drop_duplicates('产品ID', keep='last')
+        .set_index('产品ID')[['设备名称', '品牌', '主规格', '设备品类', '单价']]
+        .to_dict('index')
+    )
     
     # 读取PPT文件
-    prs = Presentation(ppt_file_path)
+    prs = load_presentation(ppt_file_path)
     
     print(f"📊 PPT包含 {len(prs.slides)} 张幻灯片")
     
-    # 统计设备信息
-    device_count = {}
-    total_devices = 0
+    # 统计设备信息（只计数，设备详情在最后从产品映射中补全）
+    device_counter = Counter()
+    
+    # 扫描过程中的日志先收集，结束后一次性输出，避免逐行print刷新stdout
+    messages = []
+    log = messages.append
     
     # 遍历所有幻灯片
     for slide_num, slide in enumerate(prs.slides, 1):
-        print(f"\n📋 分析第 {slide_num} 张幻灯片...")
+        log(f"\n📋 分析第 {slide_num} 张幻灯片...")
         
         # 遍历所有形状
         for shape_num, shape in enumerate(slide.shapes, 1):
             
             # 检查形状是否有名称
-            if hasattr(shape, 'name') and shape.name:
-                shape_name = shape.name
+            shape_name = getattr(shape, 'name', None)
+            if shape_name:
                 
                 # 检查是否是组
                 if hasattr(shape, 'shapes') and shape.shapes:
-                    print(f"   🔍 发现组 #{shape_num}: '{shape_name}'")
+                    log(f"   🔍 发现组 #{shape_num}: '{shape_name}'")
                     
                     # 遍历组内形状，寻找产品ID
                     for sub_shape_num, sub_shape in enumerate(shape.shapes, 1):
-                        if hasattr(sub_shape, 'name') and sub_shape.name:
-                            sub_shape_name = sub_shape.name
+                        sub_shape_name = getattr(sub_shape, 'name', None)
+                        if sub_shape_name:
                             
                             # 检查是否包含产品ID后缀
                             if '_id' in sub_shape_name:
                                 # 提取产品ID（去掉_id后缀）
                                 product_id = sub_shape_name.replace('_id', '')
                                 
-                                print(f"      📍 发现产品ID形状: '{sub_shape_name}'")
-                                print(f"          提取的产品ID: {product_id}")
+                                log(f"      📍 发现产品ID形状: '{sub_shape_name}'")
+                                log(f"          提取的产品ID: {product_id}")
                                 
                                 # 检查产品ID是否在模具库中
                                 if product_id in product_mapping:
                                     product_info = product_mapping[product_id]
                                     
-                                    print(f"      ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
+                                    log(f"      ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
                                     
                                     # 统计设备
-                                    if product_id not in device_count:
-                                        device_count[product_id] = {
-                                            '设备名称': product_info['设备名称'],
-                                            '品牌': product_info['品牌'],
-                                            '主规格': product_info['主规格'],
-                                            '设备品类': product_info['设备品类'],
-                                            '单价': product_info['单价'],
-                                            '数量': 0
-                                        }
-                                    
-                                    device_count[product_id]['数量'] += 1
-                                    total_devices += 1
+                                    device_counter[product_id] += 1
                                     
-                                    print(f"      📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
+                                    log(f"      📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
                                 else:
-                                    print(f"      ❌ 产品ID '{product_id}' 不在模具库中")
+                                    log(f"      ❌ 产品ID '{product_id}' 不在模具库中")
                             
                             # 检查形状名称是否直接是产品ID
                             elif sub_shape_name in product_mapping:
                                 product_id = sub_shape_name
                                 product_info = product_mapping[product_id]
                                 
-                                print(f"      📍 发现产品ID形状: '{sub_shape_name}'")
-                                print(f"      ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
+                                log(f"      📍 发现产品ID形状: '{sub_shape_name}'")
+                                log(f"      ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
                                 
                                 # 统计设备
-                                if product_id not in device_count:
-                                    device_count[product_id] = {
-                                        '设备名称': product_info['设备名称'],
-                                        '品牌': product_info['品牌'],
-                                        '主规格': product_info['主规格'],
-                                        '设备品类': product_info['设备品类'],
-                                        '单价': product_info['单价'],
-                                        '数量': 0
-                                    }
+                                device_counter[product_id] += 1
                                 
-                                device_count[product_id]['数量'] += 1
-                                total_devices += 1
-                                
-                                print(f"      📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
+                                log(f"      📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
                 
                 # 检查独立形状是否包含产品ID
                 elif '_id' in shape_name:
                     # 提取产品ID（去掉_id后缀）
                     product_id = shape_name.replace('_id', '')
                     
-                    print(f"   📍 发现独立产品ID形状: '{shape_name}'")
-                    print(f"       提取的产品ID: {product_id}")
+                    log(f"   📍 发现独立产品ID形状: '{shape_name}'")
+                    log(f"       提取的产品ID: {product_id}")
                     
                     # 检查产品ID是否在模具库中
                     if product_id in product_mapping:
                         product_info = product_mapping[product_id]
                         
-                        print(f"   ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
+                        log(f"   ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
                         
                         # 统计设备
-                        if product_id not in device_count:
-                            device_count[product_id] = {
-                                '设备名称': product_info['设备名称'],
-                                '品牌': product_info['品牌'],
-                                '主规格': product_info['主规格'],
-                                '设备品类': product_info['设备品类'],
-                                '单价': product_info['单价'],
-                                '数量': 0
-                            }
-                        
-                        device_count[product_id]['数量'] += 1
-                        total_devices += 1
+                        device_counter[product_id] += 1
                         
-                        print(f"   📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
+                        log(f"   📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
                     else:
-                        print(f"   ❌ 产品ID '{product_id}' 不在模具库中")
+                        log(f"   ❌ 产品ID '{product_id}' 不在模具库中")
                 
                 # 检查形状名称是否直接是产品ID
                 elif shape_name in product_mapping:
                     product_id = shape_name
                     product_info = product_mapping[product_id]
                     
-                    print(f"   📍 发现独立产品ID形状: '{shape_name}'")
-                    print(f"   ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
+                    log(f"   📍 发现独立产品ID形状: '{shape_name}'")
+                    log(f"   ✅ 匹配到设备: {product_info['设备名称']} ({product_info['品牌']})")
                     
                     # 统计设备
-                    if product_id not in device_count:
-                        device_count[product_id] = {
-                            '设备名称': product_info['设备名称'],
-                            '品牌': product_info['品牌'],
-                            '主规格': product_info['主规格'],
-                            '设备品类': product_info['设备品类'],
-                            '单价': product_info['单价'],
-                            '数量': 0
-                        }
+                    device_counter[product_id] += 1
                     
-                    device_count[product_id]['数量'] += 1
-                    total_devices += 1
-                    
-                    print(f"   📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
+                    log(f"   📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
+    
+    sys.stdout.write('\n'.join(messages) + '\n')
+    
+    device_count = {
+        product_id: {**product_mapping[product_id], '数量': count}
+        for product_id, count in device_counter.items()
+    }
+    total_devices = sum(device_counter.values())
     
     return device_count, total_devices
 
@@ -201,14 +168,11 @@ def generate_product_id_report(device_count, total_devices):
         return
     
     # 按设备品类分组统计
-    category_stats = {}
+    category_stats = defaultdict(list)
     total_cost = 0
     
     for product_id, info in device_count.items():
         category = info['设备品类']
-        if category not in category_stats:
-            category_stats[category] = []
-        
         category_stats[category].append(info)
         total_cost += info['单价'] * info['数量']
     
@@ -249,7 +213,7 @@ def generate_product_id_report(device_count, total_devices):
     
     report_df = pd.DataFrame(report_data)
     report_path = 'E:\\Programs\\smarthome\\output\\产品ID识别报告.xlsx'
-    report_df.to_excel(report_path, index=False)
+    write_report_excel(report_df, report_path)
     
     print(f"\n📄 详细报告已保存到: {os.path.basename(report_path)}")
 
@@ -10,6 +10,8 @@ import os
 import json
 from typing import Dict, List, Tuple
 
+from report_excel_writer import write_report_excel
+
 class ProductIDStandardizer:
     """产品ID标准化器"""
     
@@ -69,13 +71,10 @@ class ProductIDStandardizer:
         Returns:
             Dict[str, int]: 原ID到新ID的映射
         """
-        mapping = {}
-        for i, old_id in enumerate(product_ids, 1):
-            mapping[old_id] = i
+        mapping = dict(zip(product_ids, range(1, len(product_ids) + 1)))
         
-        print(f"🔄 生成产品ID映射:")
-        for old_id, new_id in mapping.items():
-            print(f"   {old_id} -> {new_id}")
+        # 拼接后一次输出，避免逐行写控制台
+        print("\n".join([f"🔄 生成产品ID映射:"] + [f"   {old_id} -> {new_id}" for old_id, new_id in mapping.items()]))
         
         return mapping
     
@@ -125,7 +124,8 @@ class ProductIDStandardizer:
             output_path = self.excel_path
         
         try:
-            self.df.to_excel(output_path, index=False)
+            # 逐行流式写出，工作表名与to_excel默认的'Sheet1'一致
+            write_report_excel(self.df, output_path)
             print(f"✅ 标准化Excel文件已保存: {output_path}")
             return True
         except Exception as e:
@@ -204,8 +204,6 @@ if __name__ == "__main__":
     mapping = standardize_product_ids(excel_path)
     
     if mapping:
-        print("🎯 标准化结果:")
-        for old_id, new_id in mapping.items():
-            print(f"   {old_id} -> {new_id}")
+        print("\n".join(["🎯 标准化结果:"] + [f"   {old_id} -> {new_id}" for old_id, new_id in mapping.items()]))
     else:
         print("❌ 标准化失败")
\ No newline at end of file
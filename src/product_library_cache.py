@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+产品库缓存模块
+按(文件路径, 修改时间)缓存智能家居模具库Excel的解析结果，
+避免各识别/统计脚本在同一进程内重复解析同一个xlsx；
+DataFrame同时按文件内容哈希落盘到用户缓存目录（不放在Excel旁边），跨进程复用
+"""
+
+import os
+import pickle
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from disk_cache import cache_file_path, read_cache, write_cache
+
+CACHE_NAMESPACE = 'product_library'
+
+
+@lru_cache(maxsize=8)
+def _read_product_library(excel_path: str, mtime_ns: int):
+    """读取Excel（优先使用磁盘缓存），mtime_ns仅作为缓存键的一部分"""
+    import pandas as pd
+
+    # 缓存只写在当前用户自己的缓存目录下，不会读到随数据文件分发的pickle
+    cache_path = cache_file_path(CACHE_NAMESPACE, excel_path, '.pkl')
+    data = read_cache(cache_path)
+    if data is not None:
+        try:
+            df = pickle.loads(data)
+        except Exception:
+            # 缓存已损坏，重新解析Excel
+            df = None
+        if isinstance(df, pd.DataFrame):
+            return df
+
+    try:
+        # python-calamine为Rust实现的xlsx解析器，比openpyxl快得多
+        df = pd.read_excel(excel_path, engine='calamine')
+    except (ImportError, ValueError):
+        # 未安装python-calamine或pandas<2.2不支持该引擎时，回退到默认的openpyxl
+        df = pd.read_excel(excel_path)
+
+    write_cache(cache_path, pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    return df
+
+
+@lru_cache(maxsize=8)
+def _read_product_records(excel_path: str, mtime_ns: int) -> Tuple[Dict[str, Any], ...]:
+    """以openpyxl只读模式流式读取第一个工作表，mtime_ns仅作为缓存键的一部分"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = next(rows, ())
+        return tuple(
+            dict(zip(headers, row))
+            for row in rows
+            if any(value is not None for value in row)
+        )
+    finally:
+        workbook.close()
+
+
+def load_product_library(excel_path: str):
+    """
+    读取模具库Excel，文件未修改时直接复用缓存结果
+
+    Args:
+        excel_path: Excel文件路径
+
+    Returns:
+        pd.DataFrame: 产品库数据副本，调用方可以安全修改
+    """
+    excel_path = os.path.abspath(excel_path)
+    mtime_ns = os.stat(excel_path).st_mtime_ns
+    return _read_product_library(excel_path, mtime_ns).copy()
+
+
+def load_product_records(excel_path: str) -> List[Dict[str, Any]]:
+    """
+    读取模具库Excel为按行的字典列表，不依赖pandas
+
+    Args:
+        excel_path: Excel文件路径
+
+    Returns:
+        List[Dict[str, Any]]: 表头到单元格值的映射列表，空单元格为None
+    """
+    excel_path = os.path.abspath(excel_path)
+    mtime_ns = os.stat(excel_path).st_mtime_ns
+    return [dict(record) for record in _read_product_records(excel_path, mtime_ns)]
+
+
+def clear_product_library_cache():
+    """清空产品库缓存"""
+    _read_product_library.cache_clear()
+    _read_product_records.cache_clear()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统计报告Excel写出模块
+逐行流式写出报告表格，不在内存中保留整个工作簿的单元格对象
+"""
+
+from typing import Any, Iterable, Sequence
+
+
+def _iter_rows(report_df) -> Iterable[Sequence[Any]]:
+    """按行产出单元格值，空值转换为None（写出为空单元格）"""
+    rows = report_df.astype(object).where(report_df.notna(), None)
+    return rows.itertuples(index=False, name=None)
+
+
+def write_report_excel(report_df, report_path: str, sheet_name: str = 'Sheet1'):
+    """
+    将报告DataFrame写出为xlsx，第一行为表头
+
+    优先使用xlsxwriter的constant_memory模式，每写完一行即落盘；
+    pandas的to_excel按列写出单元格，不能与该模式配合，因此这里按行手动写出。
+    未安装xlsxwriter时使用openpyxl的只写模式。
+
+    Args:
+        report_df: 报告数据
+        report_path: 输出文件路径
+        sheet_name: 工作表名称
+    """
+    headers = [str(column) for column in report_df.columns]
+
+    try:
+        import xlsxwriter
+    except ImportError:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(headers)
+        for row in _iter_rows(report_df):
+            sheet.append(row)
+        workbook.save(report_path)
+        return
+
+    workbook = xlsxwriter.Workbook(report_path, {'constant_memory': True})
+    try:
+        sheet = workbook.add_worksheet(sheet_name)
+        sheet.write_row(0, 0, headers)
+        for row_idx, row in enumerate(_iter_rows(report_df), 1):
+            sheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
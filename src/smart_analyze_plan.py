@@ -5,9 +5,73 @@
 """
 
 import os
+import sys
 import pandas as pd
-from pptx import Presentation
 import re
+from collections import defaultdict
+
+from product_library_cache import load_product_library
+from report_excel_writer import write_report_excel
+from pptx_index import load_shape_index
+
+def match_keyword(texts, keyword_mapping):
+    """按文本顺序查找第一个命中的设备关键词，返回(关键词, 产品ID)或None"""
+    for text in texts:
+        text_lower = text.lower()
+        for keyword, product_id in keyword_mapping.items():
+            if keyword in text_lower:
+                return keyword, product_id
+    return None
+
+def scan_slide(slide_num, shapes, keyword_mapping, product_mapping):
+    """
+    按形状索引扫描单张幻灯片
+    
+    Args:
+        slide_num: 幻灯片序号（从1开始）
+        shapes: 该幻灯片的顶层形状记录（见pptx_index.index_slide）
+        keyword_mapping: 关键词到产品ID的映射
+        product_mapping: 产品ID到设备信息的映射
+        
+    Returns:
+        tuple: (匹配到的产品ID列表（每个设备一项）, 日志列表)
+    """
+    matched_products = []
+    messages = [f"\n📋 分析第 {slide_num} 张幻灯片..."]
+    log = messages.append
+    
+    # 遍历所有顶层形状
+    for shape in shapes:
+        texts = shape['texts']
+        
+        # 检查是否是组
+        if shape['is_group']:
+            log(f"   🔍 发现组: {shape['name']}")
+            if not texts:
+                continue
+            log(f"      组内文本: {texts}")
+            indent, label = '      ', '设备'
+        
+        # 检查独立形状
+        else:
+            if not texts:
+                continue
+            indent, label = '   ', '独立设备'
+        
+        # 尝试通过关键词匹配设备
+        matched = match_keyword(texts, keyword_mapping)
+        if not matched:
+            continue
+        keyword, matched_product = matched
+        log(f"{indent}✅ 通过关键词 '{keyword}' 匹配到{label}: {matched_product}")
+        
+        # 如果匹配到设备，进行统计
+        if matched_product in product_mapping:
+            product_info = product_mapping[matched_product]
+            matched_products.append(matched_product)
+            log(f"{indent}📊 统计{label}: {product_info['设备名称']} ({product_info['品牌']})")
+    
+    return matched_products, messages
 
 def smart_analyze_smart_home_plan(ppt_file_path):
     """智能分析智能家居方案PPT中的设备"""
@@ -15,32 +79,26 @@ def smart_analyze_smart_home_plan(ppt_file_path):
     print("🔍 开始智能分析全屋智能方案...")
     print(f"📄 文件: {os.path.basename(ppt_file_path)}")
     
-    # 检查文件是否存在
-    if not os.path.exists(ppt_file_path):
+    # 读取共享的PPT形状索引（首次解析后按文件内容缓存），文件不存在时由读取本身报错
+    try:
+        slides = load_shape_index(ppt_file_path)
+    except FileNotFoundError:
         print(f"❌ 文件不存在: {ppt_file_path}")
         return None
     
     # 读取Excel模具库
     excel_path = 'E:\\Programs\\smarthome\\智能家居模具库.xlsx'
-    if not os.path.exists(excel_path):
+    try:
+        df = load_product_library(excel_path)
+    except FileNotFoundError:
         print("❌ Excel模具库文件不存在")
         return None
     
-    df = pd.read_excel(excel_path)
     print(f"📊 模具库包含 {len(df)} 个产品")
     
-    # 创建产品映射
-    product_mapping = {}
-    for _, row in df.iterrows():
-        product_id = row['产品ID']
-        product_mapping[product_id] = {
-            '设备名称': row['设备名称'],
-            '品牌': row['品牌'],
-            '主规格': row['主规格'],
-            '设备品类': row['设备品类'],
-            '单价': row['单价'],
-            '设备简称': row['设备简称']
-        }
+    # 创建产品映射（重复的产品ID以最后一行为准）
+    product_library = df.drop_duplicates('产品ID', keep='last').set_index('产品ID')
+    product_mapping = product_library[['设备名称', '品牌', '主规格', '设备品类', '单价', '设备简称']].to_dict('index')
     
     # 创建关键词映射（通过设备简称和关键词匹配）
     keyword_mapping = {}
@@ -58,105 +116,24 @@ def smart_analyze_smart_home_plan(ppt_file_path):
         if '传感器' in device_name:
             keyword_mapping['传感器'] = product_id
     
-    # 读取PPT文件
-    prs = Presentation(ppt_file_path)
+    print(f"📊 PPT包含 {len(slides)} 张幻灯片")
     
-    print(f"📊 PPT包含 {len(prs.slides)} 张幻灯片")
+    # 在当前进程中逐张扫描（每张约0.25ms，不值得启动进程池），扫描日志最后一次性输出
+    matched_products = []
+    messages = []
+    for slide_num, shapes in enumerate(slides, 1):
+        slide_products, slide_messages = scan_slide(slide_num, shapes, keyword_mapping, product_mapping)
+        matched_products.extend(slide_products)
+        messages.extend(slide_messages)
     
-    # 统计设备信息
-    device_count = {}
-    total_devices = 0
+    sys.stdout.write('\n'.join(messages) + '\n')
     
-    # 遍历所有幻灯片
-    for slide_num, slide in enumerate(prs.slides, 1):
-        print(f"\n📋 分析第 {slide_num} 张幻灯片...")
-        
-        # 遍历所有形状
-        for shape in slide.shapes:
-            # 检查是否是组
-            if shape.shape_type == 6:  # GroupShape
-                print(f"   🔍 发现组: {shape.name}")
-                
-                # 检查组内是否有设备信息
-                group_texts = []
-                
-                # 遍历组内形状
-                for sub_shape in shape.shapes:
-                    if hasattr(sub_shape, 'text') and sub_shape.text:
-                        text = sub_shape.text.strip()
-                        if text:
-                            group_texts.append(text)
-                
-                # 分析组内文本内容
-                if group_texts:
-                    print(f"      组内文本: {group_texts}")
-                    
-                    # 尝试通过关键词匹配设备
-                    matched_product = None
-                    for text in group_texts:
-                        text_lower = text.lower()
-                        
-                        # 检查是否包含设备关键词
-                        for keyword, product_id in keyword_mapping.items():
-                            if keyword in text_lower:
-                                matched_product = product_id
-                                print(f"      ✅ 通过关键词 '{keyword}' 匹配到设备: {product_id}")
-                                break
-                        
-                        if matched_product:
-                            break
-                    
-                    # 如果匹配到设备，进行统计
-                    if matched_product and matched_product in product_mapping:
-                        product_info = product_mapping[matched_product]
-                        
-                        if matched_product not in device_count:
-                            device_count[matched_product] = {
-                                '设备名称': product_info['设备名称'],
-                                '品牌': product_info['品牌'],
-                                '主规格': product_info['主规格'],
-                                '设备品类': product_info['设备品类'],
-                                '单价': product_info['单价'],
-                                '数量': 0
-                            }
-                        
-                        device_count[matched_product]['数量'] += 1
-                        total_devices += 1
-                        
-                        print(f"      📊 统计设备: {product_info['设备名称']} ({product_info['品牌']})")
-            
-            # 检查独立形状
-            elif hasattr(shape, 'text') and shape.text:
-                text = shape.text.strip()
-                if text:
-                    text_lower = text.lower()
-                    
-                    # 检查是否包含设备关键词
-                    matched_product = None
-                    for keyword, product_id in keyword_mapping.items():
-                        if keyword in text_lower:
-                            matched_product = product_id
-                            print(f"   ✅ 通过关键词 '{keyword}' 匹配到独立设备: {product_id}")
-                            break
-                    
-                    # 如果匹配到设备，进行统计
-                    if matched_product and matched_product in product_mapping:
-                        product_info = product_mapping[matched_product]
-                        
-                        if matched_product not in device_count:
-                            device_count[matched_product] = {
-                                '设备名称': product_info['设备名称'],
-                                '品牌': product_info['品牌'],
-                                '主规格': product_info['主规格'],
-                                '设备品类': product_info['设备品类'],
-                                '单价': product_info['单价'],
-                                '数量': 0
-                            }
-                        
-                        device_count[matched_product]['数量'] += 1
-                        total_devices += 1
-                        
-                        print(f"   📊 统计独立设备: {product_info['设备名称']} ({product_info['品牌']})")
+    # 统计设备信息：按产品ID计数后与模具库关联（保持设备首次出现的顺序）
+    counts = pd.Series(matched_products, dtype=object).value_counts(sort=False)
+    device_df = product_library.loc[counts.index, ['设备名称', '品牌', '主规格', '设备品类', '单价']]
+    device_df['数量'] = counts
+    device_count = device_df.to_dict('index')
+    total_devices = int(counts.sum())
     
     return device_count, total_devices
 
@@ -175,14 +152,11 @@ def generate_smart_report(device_count, total_devices):
         return
     
     # 按设备品类分组统计
-    category_stats = {}
+    category_stats = defaultdict(list)
     total_cost = 0
     
     for product_id, info in device_count.items():
         category = info['设备品类']
-        if category not in category_stats:
-            category_stats[category] = []
-        
         category_stats[category].append(info)
         total_cost += info['单价'] * info['数量']
     
@@ -223,7 +197,7 @@ def generate_smart_report(device_count, total_devices):
     
     report_df = pd.DataFrame(report_data)
     report_path = 'E:\\Programs\\smarthome\\output\\全屋智能方案智能分析报告.xlsx'
-    report_df.to_excel(report_path, index=False)
+    write_report_excel(report_df, report_path)
     
     print(f"\n📄 详细报告已保存到: {os.path.basename(report_path)}")
 
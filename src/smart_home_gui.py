@@ -18,7 +18,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入集成接口
 from gui_integration import GUIIntegration
-from config_manager import ConfigManager
+from config_manager import get_config_manager
 
 class SmartHomeGUI:
     def __init__(self):
@@ -39,7 +39,7 @@ class SmartHomeGUI:
         self.integration = GUIIntegration()
         
         # 创建配置管理器实例
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         
         # 当前处理状态
         self.processing = False
@@ -56,6 +56,9 @@ class SmartHomeGUI:
         # 加载历史记录和配置文件
         self._load_and_display_history()
         self._load_configuration()
+        
+        # 关闭窗口时写入尚未保存的配置（如逐字输入的文件名）
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _create_styles(self):
         """创建现代化简约风格样式"""
@@ -471,6 +474,7 @@ class SmartHomeGUI:
                 excel_file_path=filename,
                 mold_library_filename=self.mold_output_name.get()
             )
+            self.config_manager.flush()
             
     def select_procurement_file(self):
         """选择采购清单文件"""
@@ -490,6 +494,7 @@ class SmartHomeGUI:
                 mold_library_file_path=self.mold_library_file_path.get(),
                 procurement_filename=self.procurement_output_name.get()
             )
+            self.config_manager.flush()
             
     def clear_mold_file(self):
         """清除模具文件选择"""
@@ -520,6 +525,7 @@ class SmartHomeGUI:
                 mold_library_file_path=self.mold_library_file_path.get(),
                 procurement_filename=self.procurement_output_name.get()
             )
+            self.config_manager.flush()
             
     def select_mold_library_file(self):
         """选择模具库文件"""
@@ -538,6 +544,7 @@ class SmartHomeGUI:
                 mold_library_file_path=filename,
                 procurement_filename=self.procurement_output_name.get()
             )
+            self.config_manager.flush()
             
     def clear_template_file(self):
         """清除模板文件选择"""
@@ -597,6 +604,7 @@ class SmartHomeGUI:
             excel_file_path=self.mold_file_path.get(),
             mold_library_filename=self.mold_output_name.get()
         )
+        self.config_manager.flush()
             
         # 开始处理
         self.processing = True
@@ -695,6 +703,7 @@ class SmartHomeGUI:
             mold_library_file_path=self.mold_library_file_path.get(),
             procurement_filename=self.procurement_output_name.get()
         )
+        self.config_manager.flush()
             
         # 开始处理
         self.processing = True
@@ -1074,6 +1083,11 @@ class SmartHomeGUI:
         """更新状态栏"""
         self.status_text.set(message)
         
+    def _on_close(self):
+        """关闭窗口：先保存配置再退出"""
+        self.config_manager.flush()
+        self.root.destroy()
+        
     def run(self):
         """运行应用"""
         self.root.mainloop()
@@ -153,9 +153,17 @@ class TemplateCopyEngine:
         
         print("   🎨 复制单元格样式和内容...")
         
+        # 预先计算被合并区域覆盖的单元格，避免逐单元格判断是否位于合并区域内
+        merged_covered = self._get_merged_covered_cells()
+        
         # 复制单元格样式和内容
         for row in range(1, self.source_worksheet.max_row + 1):
             for col in range(1, self.source_worksheet.max_column + 1):
+                # 被覆盖的单元格随后会被_copy_merged_cells替换为MergedCell，
+                # 其边框也由左上角单元格重新生成，这里复制的内容和样式都会被丢弃
+                if (row, col) in merged_covered:
+                    continue
+                
                 source_cell = self.source_worksheet.cell(row=row, column=col)
                 target_cell = self.target_worksheet.cell(row=row, column=col)
                 
@@ -170,6 +178,21 @@ class TemplateCopyEngine:
                 # 复制样式
                 self._copy_cell_style(source_cell, target_cell)
     
+    def _get_merged_covered_cells(self) -> set:
+        """
+        获取源工作表中被合并区域覆盖的单元格坐标（不含各区域左上角单元格）
+        
+        Returns:
+            set: (行号, 列号)集合
+        """
+        covered = set()
+        for merged_range in self.source_worksheet.merged_cells.ranges:
+            for row in range(merged_range.min_row, merged_range.max_row + 1):
+                for col in range(merged_range.min_col, merged_range.max_col + 1):
+                    covered.add((row, col))
+            covered.discard((merged_range.min_row, merged_range.min_col))
+        return covered
+    
     def _copy_cell_style(self, source_cell, target_cell):
         """复制单元格样式"""
         try:
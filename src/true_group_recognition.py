@@ -5,9 +5,13 @@
 支持识别真组结构中的产品信息（组名称=产品ID）
 """
 
-from pptx import Presentation
 import pandas as pd
 import os
+from collections import Counter, defaultdict
+
+from product_library_cache import load_product_library
+from report_excel_writer import write_report_excel
+from pptx_index import load_shape_index
 
 def read_excel_product_library(excel_path):
     """从Excel模具库读取产品信息"""
@@ -15,20 +19,25 @@ def read_excel_product_library(excel_path):
         print(f"❌ Excel模具库文件不存在: {excel_path}")
         return {}
     
-    df = pd.read_excel(excel_path)
-    product_library = {}
-    
-    for index, row in df.iterrows():
-        product_id = row.get('产品ID', '')
-        if pd.notna(product_id) and product_id:
-            product_library[product_id] = {
-                '设备名称': row.get('设备名称', ''),
-                '品牌': row.get('品牌', ''),
-                '主规格': row.get('主规格', ''),
-                '设备品类': row.get('设备品类', ''),
-                '单价': row.get('单价', 0),
-                '设备简称': row.get('设备简称', '')
-            }
+    df = load_product_library(excel_path)
+    
+    # 缺失的列使用默认值补齐
+    columns = {'设备名称': '', '品牌': '', '主规格': '', '设备品类': '', '单价': 0, '设备简称': ''}
+    for column, default in columns.items():
+        if column not in df.columns:
+            df[column] = default
+    
+    if '产品ID' not in df.columns:
+        product_library = {}
+    else:
+        # 过滤空产品ID，重复的产品ID以最后一行为准
+        valid = df['产品ID'].notna() & df['产品ID'].astype(bool)
+        product_library = (
+            df[valid]
+            .drop_duplicates('产品ID', keep='last')
+            .set_index('产品ID')[list(columns)]
+            .to_dict('index')
+        )
     
     print(f"📊 从Excel读取 {len(product_library)} 个产品信息")
     return product_library
@@ -40,33 +49,30 @@ def analyze_true_group_ppt(ppt_path, product_library):
         print(f"❌ PPT文件不存在: {ppt_path}")
         return {}
     
-    prs = Presentation(ppt_path)
+    # 只需要形状名称，使用共享的PPT形状索引
+    slides = [[shape['name'] for shape in shapes] for shapes in load_shape_index(ppt_path)]
     print(f"📄 分析PPT文件: {os.path.basename(ppt_path)}")
-    print(f"📊 幻灯片数量: {len(prs.slides)}")
+    print(f"📊 幻灯片数量: {len(slides)}")
     
-    device_count = {}
+    device_count = Counter()
     total_devices = 0
     
     # 遍历所有幻灯片
-    for slide_num, slide in enumerate(prs.slides, 1):
+    for slide_num, shape_names in enumerate(slides, 1):
         print(f"\n📋 分析第 {slide_num} 张幻灯片...")
         
         # 统计产品组
-        product_groups = {}
-        for shape in slide.shapes:
-            if hasattr(shape, 'name') and shape.name:
+        product_groups = Counter()
+        for shape_name in shape_names:
+            if shape_name:
                 # 通过_id后缀识别产品组
-                if shape.name.endswith('_id'):
-                    product_id = shape.name.replace('_id', '')
+                if shape_name.endswith('_id'):
+                    product_id = shape_name.replace('_id', '')
                     if product_id in product_library:
-                        if product_id not in product_groups:
-                            product_groups[product_id] = 0
                         product_groups[product_id] += 1
         
         # 统计设备数量
         for product_id, count in product_groups.items():
-            if product_id not in device_count:
-                device_count[product_id] = 0
             device_count[product_id] += count
             total_devices += count
             
@@ -87,7 +93,7 @@ def generate_true_group_report(device_count, total_devices, product_library):
         return
     
     # 按设备品类分组统计
-    category_stats = {}
+    category_stats = defaultdict(list)
     total_cost = 0
     
     for product_id, count in device_count.items():
@@ -95,9 +101,6 @@ def generate_true_group_report(device_count, total_devices, product_library):
             product_info = product_library[product_id]
             category = product_info['设备品类']
             
-            if category not in category_stats:
-                category_stats[category] = []
-            
             category_stats[category].append({
                 '设备名称': product_info['设备名称'],
                 '品牌': product_info['品牌'],
@@ -147,7 +150,7 @@ def generate_true_group_report(device_count, total_devices, product_library):
     
     report_df = pd.DataFrame(report_data)
     report_path = 'E:\\Programs\\smarthome\\output\\true_group_recognition_report.xlsx'
-    report_df.to_excel(report_path, index=False)
+    write_report_excel(report_df, report_path)
     
     print(f"\n📄 详细报告已保存到: {os.path.basename(report_path)}")
 